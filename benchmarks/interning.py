@@ -0,0 +1,103 @@
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+from importlib import import_module
+
+EXAMPLES = [
+    ('examples.tutorial.tutorial', {}),
+    ('examples.tutorial.unsafe', {}),
+    ('examples.tutorial.unsafe_unique', {}),
+    ('examples.1d_table.discrete', {}),
+    ('examples.1d_table.hybrid', {}),
+    ('examples.kitchen.boil_water', {}),
+]
+MAX_EVALS = 200
+MAX_TIME = 10
+
+
+def object_size(obj):
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    if hasattr(obj, '_tuple'):
+        size += sys.getsizeof(obj._tuple)
+    return size
+
+
+def live_objects(classes):
+    gc.collect()
+    return [obj for obj in gc.get_objects() if isinstance(obj, classes)]
+
+
+def measure(module_name, kwargs, max_evals, interning):
+    # Must run in a fresh interpreter: interning is fixed when ss.model is imported
+    import ss.utils
+    ss.utils.INTERNING = interning
+    from ss.algorithms.incremental import evaluate_stream_instances
+    from ss.algorithms.universe import Universe
+    from ss.model.functions import Head, Evaluation
+
+    module = import_module(module_name)
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        problem = module.create_problem(**kwargs)
+        universe = Universe(problem, problem.initial, use_bounds=False, only_eager=False)
+        evaluate_stream_instances(universe, max_evals, time.time(), MAX_TIME)
+        actions = [action.instantiate(args) for action, args in universe.action_instances()]
+        axioms = [axiom.instantiate(args) for axiom, args in universe.axiom_instances()]
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    objects = live_objects((Head, Evaluation))
+    return {
+        'evaluations': len(universe.evaluations),
+        'operators': len(actions) + len(axioms),
+        'objects': len(objects),
+        'distinct': len(set(objects)),
+        'bytes': sum(map(object_size, objects)),
+    }
+
+
+def run_measure(module_name, kwargs, max_evals, interning):
+    command = [sys.executable, '-m', 'benchmarks.interning', '--measure', module_name,
+               '--kwargs', json.dumps(kwargs), '--max_evals', str(max_evals)]
+    if not interning:
+        command.append('--plain')
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    output, error = process.communicate()
+    if process.returncode != 0:
+        return {'error': error.strip().split('\n')[-1]}
+    return json.loads(output)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Compares head and evaluation objects with and without interning.')
+    parser.add_argument('-n', '--max_evals', type=int, default=MAX_EVALS)
+    parser.add_argument('--measure', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--kwargs', default='{}', help=argparse.SUPPRESS)
+    parser.add_argument('--plain', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.measure is not None:
+        print json.dumps(measure(args.measure, json.loads(args.kwargs), args.max_evals, not args.plain))
+        return
+
+    print 'Example | Evaluations | Objects (plain) | Distinct (plain) | Objects (interned) | ' \
+          'Bytes (plain) | Bytes (interned) | Saved'
+    for name, kwargs in EXAMPLES:
+        plain = run_measure(name, kwargs, args.max_evals, False)
+        interned = run_measure(name, kwargs, args.max_evals, True)
+        if ('error' in plain) or ('error' in interned):
+            print '{} | skipped ({})'.format(name, plain.get('error', interned.get('error')))
+            continue
+        assert plain['evaluations'] == interned['evaluations']
+        print '{} | {} | {} | {} | {} | {} | {} | {:.1%}'.format(
+            name, interned['evaluations'], plain['objects'], plain['distinct'], interned['objects'],
+            plain['bytes'], interned['bytes'], 1 - float(interned['bytes']) / plain['bytes'])
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,46 @@
+import sys
+import time
+
+from ss.algorithms.downward import DownwardProblem, write_sas
+from ss.model.functions import Predicate, TotalCost, Increase, initialize
+from ss.model.operators import Action, Axiom
+
+SIZES = [1000, 10000, 100000, 300000]
+
+
+class CountingStream(object):
+    def __init__(self):
+        self.size = 0
+
+    def write(self, chunk):
+        self.size += len(chunk)
+
+
+def create_problem(n):
+    At = Predicate('?x')
+    Visited = Predicate('?x')
+    Reached = Predicate('')
+    actions = [Action(name='move', param=[],
+                      pre=[At(i)],
+                      eff=[At(i + 1), ~At(i), Visited(i + 1), Increase(TotalCost(), 1)])
+               for i in xrange(n)]
+    axioms = [Axiom(param=[], pre=[Visited(n)], eff=Reached())]
+    initial = [At(0), initialize(TotalCost(), 0)]
+    return DownwardProblem(initial, [Reached()], actions, axioms)
+
+
+def main(argv):
+    sizes = map(int, argv) if argv else SIZES
+    print 'Operators | Variables | Bytes | Time (s) | Time / operator (us)'
+    for n in sizes:
+        problem = create_problem(n)
+        stream = CountingStream()
+        t0 = time.time()
+        write_sas(problem, stream)
+        elapsed = time.time() - t0
+        print '{} | {} | {} | {:.3f} | {:.3f}'.format(len(problem.actions), len(problem.var_order),
+                                                     stream.size, elapsed, 1e6 * elapsed / n)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
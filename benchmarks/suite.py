@@ -0,0 +1,146 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+import traceback
+from importlib import import_module
+from multiprocessing import Process, Queue
+
+from ss.algorithms.downward import PlannerUnavailable
+from ss.algorithms.dual_focused import dual_focused
+from ss.algorithms.fast_downward import has_fast_downward, ENV_VAR
+from ss.algorithms.focused import focused
+from ss.algorithms.incremental import incremental, exhaustive
+from ss.algorithms.plan_focused import plan_focused
+from ss.algorithms.sequence_focused import sequence_focused
+from ss.model.problem import get_cost, get_length
+from ss.utils import INF
+
+MAX_TIME = 30
+KILL_DELAY = 5
+
+
+def sizes(name, values):
+    return [{name: value} for value in values]
+
+
+EXAMPLES = [
+    ('tutorial', 'examples.tutorial.tutorial', sizes('n', [2, 3, 5])),
+    ('unsafe', 'examples.tutorial.unsafe', sizes('n', [2, 3])),
+    ('unsafe_unique', 'examples.tutorial.unsafe_unique', sizes('n', [1, 2])),
+    ('discrete', 'examples.1d_table.discrete', [{}]),
+    ('hybrid', 'examples.1d_table.hybrid', [{}]),
+    ('boil_water', 'examples.kitchen.boil_water', [{'verboseFns': False}]),
+]
+
+ALGORITHMS = [
+    ('incremental', incremental, {}),
+    ('exhaustive', exhaustive, {}),
+    ('focused', focused, {}),
+    ('dual_focused', dual_focused, {}),
+    ('sequence_focused', sequence_focused, {}),
+    ('plan_focused', plan_focused, {}),
+]
+
+
+def algorithm_kwargs(name, kwargs, max_time):
+    kwargs = dict(kwargs, max_time=max_time)
+    if name == 'exhaustive':
+        kwargs['search_time'] = max_time / 2.
+    return kwargs
+
+
+def finite(value):
+    return None if value == INF else value
+
+
+def plan_cost(plan, evaluations):
+    try:
+        return finite(get_cost(plan, evaluations))
+    except KeyError:
+        return None
+
+
+def solve_case(module_name, problem_kwargs, algorithm, kwargs):
+    module = import_module(module_name)
+    problem = module.create_problem(**problem_kwargs)
+    start_time = time.time()
+    plan, evaluations, statistics = algorithm(problem, **kwargs)
+    elapsed_time = time.time() - start_time
+    report = statistics.report()
+    return {
+        'status': 'solved' if plan is not None else 'unsolved',
+        'wall_time': elapsed_time,
+        'peak_memory_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'iterations': report['counters'].get('iterations'),
+        'evaluations': len(evaluations),
+        'plan_length': finite(get_length(plan, evaluations)),
+        'plan_cost': plan_cost(plan, evaluations),
+        'phases': report['phases'],
+        'counters': report['counters'],
+    }
+
+
+def run_case(queue, *args):
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+    try:
+        result = solve_case(*args)
+    except ImportError as e:
+        result = {'status': 'skipped', 'error': str(e)}
+    except PlannerUnavailable as e:
+        result = {'status': 'unavailable', 'error': str(e)}
+    except Exception:
+        result = {'status': 'error', 'error': traceback.format_exc().strip().split('\n')[-1]}
+    queue.put(result)
+
+
+def benchmark_case(module_name, problem_kwargs, algorithm, kwargs, max_time):
+    queue = Queue()
+    process = Process(target=run_case, args=(queue, module_name, problem_kwargs, algorithm, kwargs))
+    start_time = time.time()
+    process.start()
+    process.join(max_time + KILL_DELAY)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        if not has_fast_downward():
+            # Without Fast Downward only small tasks are in scope, so an overrun is not a measurement
+            return {'status': 'unavailable', 'wall_time': time.time() - start_time,
+                    'error': 'timed out without Fast Downward ({} is not defined)'.format(ENV_VAR)}
+        return {'status': 'timeout', 'wall_time': time.time() - start_time}
+    if queue.empty():
+        return {'status': 'error', 'error': 'exit code {}'.format(process.exitcode)}
+    return queue.get()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Benchmarks the examples under each algorithm. Without FD_PATH, only '
+                                                 'small tasks are planned in-process; the rest are reported unavailable.')
+    parser.add_argument('-e', '--examples', nargs='+', default=[name for name, _, _ in EXAMPLES])
+    parser.add_argument('-a', '--algorithms', nargs='+', default=[name for name, _, _ in ALGORITHMS])
+    parser.add_argument('-t', '--max_time', type=float, default=MAX_TIME)
+    parser.add_argument('-o', '--output', default=None, help='JSON lines file (defaults to stdout)')
+    args = parser.parse_args(argv)
+
+    output = sys.stdout if args.output is None else open(args.output, 'w')
+    for example, module_name, problem_sizes in EXAMPLES:
+        if example not in args.examples:
+            continue
+        for problem_kwargs in problem_sizes:
+            for name, algorithm, kwargs in ALGORITHMS:
+                if name not in args.algorithms:
+                    continue
+                result = benchmark_case(module_name, problem_kwargs, algorithm,
+                                        algorithm_kwargs(name, kwargs, args.max_time), args.max_time)
+                result.update({'example': example, 'size': problem_kwargs, 'algorithm': name})
+                output.write(json.dumps(result, sort_keys=True) + '\n')
+                output.flush()
+    if output is not sys.stdout:
+        output.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -4,7 +4,7 @@ from ss.model.operators import Action, Axiom
 from ss.algorithms.incremental import exhaustive, incremental
 
 
-def main(n=2, verbose=False):
+def create_problem(n=2):
 
     Item = Predicate('?b')
     Part = Predicate('?r')
@@ -85,13 +85,17 @@ def main(n=2, verbose=False):
 
     goal_literals = [Holding('green'), Holding('soup')]
 
-    problem = Problem(initial_atoms, goal_literals, actions,
-                      axioms, [], objective=TotalCost())
+    return Problem(initial_atoms, goal_literals, actions,
+                   axioms, [], objective=TotalCost())
+
 
+def main(n=2, verbose=False):
+    problem = create_problem(n=n)
     print problem
 
-    plan, evaluations = incremental(problem, verbose=verbose)
+    plan, evaluations, statistics = incremental(problem, verbose=verbose)
     print plan
+    statistics.dump()
 
 if __name__ == '__main__':
     main()
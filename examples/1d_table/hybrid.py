@@ -18,7 +18,7 @@ Grasp = namedtuple('Grasp', ['o'])
 BConf = namedtuple('BConf', ['x', 'y'])
 
 
-def main():
+def create_problem():
     initial_bq = BConf(0, 1)
 
     initial_poses = {
@@ -191,15 +191,18 @@ def main():
 
     goal_literals = [On('green0', 'table1'), On('green1', 'table1')]
 
-    problem = Problem(initial_atoms, goal_literals, actions,
-                      axioms, streams, objective=TotalCost())
+    return Problem(initial_atoms, goal_literals, actions,
+                   axioms, streams, objective=TotalCost())
+
 
+def main():
+    problem = create_problem()
     print problem
 
     pr = cProfile.Profile()
     pr.enable()
 
-    plan, _ = dual_focused(problem)
+    plan, _, _ = dual_focused(problem)
     pr.disable()
     pstats.Stats(pr).sort_stats('tottime').print_stats(10)
 
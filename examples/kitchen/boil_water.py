@@ -260,12 +260,13 @@ def main(argv):
     problem = create_problem(verboseFns=False, **TEST_ARGS[testNum])
     print problem
 
-    plan, evaluations = incremental(problem,
-                                    planner='ff-astar',
-                                    max_time=5,
-                                    terminate_cost=INF,
-                                    verbose=False,
-                                    verbose_search=False)
+    plan, evaluations, statistics = incremental(problem,
+                                                planner='ff-astar',
+                                                max_time=5,
+                                                terminate_cost=INF,
+                                                verbose=False,
+                                                verbose_search=False)
+    statistics.dump()
 
     if plan is None:
         print '\nFailed to find a plan'
@@ -7,14 +7,13 @@ from ss.algorithms.focused import focused
 from ss.algorithms.plan_focused import plan_focused
 from ss.algorithms.dual_focused import dual_focused
 from ss.algorithms.sequence_focused import sequence_focused
-from ss.algorithms.hierarchical_focused import hierarchical_focused
 from ss.utils import INF
 
 import cProfile
 import pstats
 
 
-def main(n=3, bound='shared'):
+def create_problem(n=3, bound='shared'):
     initial_conf = 0
     initial_poses = {'b{}'.format(i): i for i in xrange(n)}
 
@@ -82,14 +81,17 @@ def main(n=3, bound='shared'):
 
     goal_literals = [AtPose(b, p) for b, p in goal_poses.items()]
 
-    problem = Problem(initial_atoms, goal_literals, actions, axioms, streams,)
+    return Problem(initial_atoms, goal_literals, actions, axioms, streams,)
+
 
+def main(n=3, bound='shared'):
+    problem = create_problem(n=n, bound=bound)
     print problem
 
     pr = cProfile.Profile()
     pr.enable()
 
-    plan, evaluations = dual_focused(
+    plan, evaluations, _ = dual_focused(
         problem, terminate_cost=INF, verbose=True, effort_weight=1)
 
     print plan
@@ -57,7 +57,7 @@ class PoseGen(CondGen):
         return [(p,)]
 
 
-def main(n=2, bound='unique'):
+def create_problem(n=2, bound='unique'):
     initial_conf = CONF(-1)
 
     blocks = ['b{}'.format(i) for i in xrange(n)]
@@ -130,15 +130,19 @@ def main(n=2, bound='unique'):
 
     goal_literals = [AtPose(b, p) for b, p in goal_poses.items()]
 
-    problem = Problem(initial_atoms, goal_literals, actions,
-                      axioms, streams, objective=TotalCost())
+    return Problem(initial_atoms, goal_literals, actions,
+                   axioms, streams, objective=TotalCost())
+
+
+def main(n=2, bound='unique'):
+    problem = create_problem(n=n, bound=bound)
     print problem
 
     pr = cProfile.Profile()
     pr.enable()
 
-    plan, evaluations = dual_focused(problem, terminate_cost=INF, verbose=False, bind=True,
-                                     use_context=True, temp_dir='fish/', clean=True)
+    plan, evaluations, _ = dual_focused(problem, terminate_cost=INF, verbose=False, bind=True,
+                                        use_context=True, temp_dir='fish/', clean=True)
 
     print plan
     pr.disable()
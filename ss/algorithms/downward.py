@@ -1,15 +1,23 @@
 import math
 
-from fast_downward import write,    TEMP_DIR, TRANSLATE_OUTPUT, remove_paths, run_search, ensure_dir
+from fast_downward import run_search, temp_workspace, has_fast_downward, ENV_VAR
+from ss.algorithms.python_search import python_search, is_small, has_python_planner, MAX_OPERATORS, PYTHON_PLANNERS
 from ss.model.functions import Head, Literal, TotalCost, Increase
 from ss.model.operators import apply, Goal
+from ss.model.statistics import phase
 from ss.utils import INF
-from collections import defaultdict, namedtuple
+from collections import defaultdict, namedtuple, deque
+from functools import partial
 
 COST_SCALE = 1
 MAX_COST = (2**31 - 1) / 100
 
 
+class PlannerUnavailable(RuntimeError):
+    # Raised when a task needs Fast Downward but FD_PATH is not set
+    pass
+
+
 def transform_cost(cost):
     new_cost = int(math.ceil(COST_SCALE * cost))
     assert new_cost < MAX_COST
@@ -17,85 +25,85 @@ def transform_cost(cost):
 
 
 def sas_version(version=3):
-    return 'begin_version\n'           '%s\n'           'end_version\n' % version
+    yield 'begin_version\n'           '%s\n'           'end_version\n' % version
 
 
 def sas_action_costs(problem):
-    return 'begin_metric\n'           '%s\n'           'end_metric\n' % int(problem.costs)
+    yield 'begin_metric\n'           '%s\n'           'end_metric\n' % int(problem.costs)
 
 
 def sas_variables(problem):
-    s = '%s\n' % len(problem.var_order)
+    yield '%s\n' % len(problem.var_order)
     for i, var in enumerate(problem.var_order):
         axiom_layer = 0 if var in problem.derived_vars else -1
         n = len(problem.index_from_var_val[var])
         assert 2 <= n
         name = 'var%s' % i
 
-        s += 'begin_variable\n'             '%s\n'             '%s\n'             '%s\n' % (
+        yield 'begin_variable\n'             '%s\n'             '%s\n'             '%s\n' % (
             name, axiom_layer, n)
-        for j, val in enumerate(problem.index_from_var_val[var]):
-            name = 'val%s' % j
-
-            s += '%s\n' % name
-        s += 'end_variable\n'
-    return s
+        yield ''.join('val%s\n' % j for j in xrange(n))
+        yield 'end_variable\n'
 
 
 def sas_mutexes(problem):
-    s = '%s\n' % len(problem.mutexes)
+    yield '%s\n' % len(problem.mutexes)
     for mutex in problem.mutexes:
-        s += 'begin_mutex_group\n'             '%s\n' % len(mutex)
+        yield 'begin_mutex_group\n'             '%s\n' % len(mutex)
         for fact in mutex:
-            s += '%s %s\n' % problem.get_var_val(fact)
-        s += 'end_mutex_group'
-    return s
+            yield '%s %s\n' % problem.get_var_val(fact)
+        yield 'end_mutex_group\n'
 
 
 def sas_initial(problem):
-    s = 'begin_state\n'
+    yield 'begin_state\n'
     for var in problem.var_order:
-        s += '%s\n' % problem.get_val(var, problem.initial[var])
-    s += 'end_state\n'
-    return s
+        yield '%s\n' % problem.get_val(var, problem.initial[var])
+    yield 'end_state\n'
 
 
 def sas_conditions(problem, conditions):
-    s = '%s\n' % len(conditions)
-    for fact in conditions:
-        s += '%s %s\n' % problem.get_var_val(fact)
-    return s
+    return '%s\n' % len(conditions) + ''.join('%s %s\n' % problem.get_var_val(fact) for fact in conditions)
 
 
 def sas_goal(problem):
-    s = 'begin_goal\n' + sas_conditions(problem, problem.goal) + 'end_goal\n'
-    return s
+    yield 'begin_goal\n' + sas_conditions(problem, problem.goal) + 'end_goal\n'
 
 
 def sas_actions(problem):
-    s = '%s\n' % len(problem.actions)
+    yield '%s\n' % len(problem.actions)
     for i, action in enumerate(problem.actions):
-        s += 'begin_operator\n'             'a-%s\n' % i
-        s += sas_conditions(problem, action.preconditions)
-        s += '%s\n' % len(action.effects)
+        yield 'begin_operator\n'             'a-%s\n' % i
+        yield sas_conditions(problem, action.preconditions)
+        yield '%s\n' % len(action.effects)
         for fact in action.effects:
-            s += '0 %s -1 %s\n' % problem.get_var_val(fact)
-        s += '%s\n'             'end_operator\n' % transform_cost(action.cost)
-    return s
+            yield '0 %s -1 %s\n' % problem.get_var_val(fact)
+        yield '%s\n'             'end_operator\n' % transform_cost(action.cost)
 
 
 def sas_axioms(problem):
-    s = '%s\n' % len(problem.axioms)
+    yield '%s\n' % len(problem.axioms)
     for axiom in problem.axioms:
-        s += 'begin_rule\n'
-        s += sas_conditions(problem, axiom.preconditions)
-        s += '%s -1 %s\n' % problem.get_var_val(axiom.effect)
-        s += 'end_rule\n'
-    return s
+        yield 'begin_rule\n'
+        yield sas_conditions(problem, axiom.preconditions)
+        yield '%s -1 %s\n' % problem.get_var_val(axiom.effect)
+        yield 'end_rule\n'
+
+
+def iterate_sas(problem):
+    for section in (sas_version(), sas_action_costs(problem), sas_variables(problem), sas_mutexes(problem),
+                    sas_initial(problem), sas_goal(problem), sas_actions(problem), sas_axioms(problem)):
+        for chunk in section:
+            yield chunk
+
+
+def write_sas(problem, stream):
+    for chunk in iterate_sas(problem):
+        stream.write(chunk)
 
 
 def to_sas(problem):
-    return sas_version() + sas_action_costs(problem) + sas_variables(problem) + sas_mutexes(problem) + sas_initial(problem) + sas_goal(problem) + sas_actions(problem) + sas_axioms(problem)
+    return ''.join(iterate_sas(problem))
 
 
 Fact = namedtuple('Fact', ['var', 'val'])
@@ -162,12 +170,16 @@ class DownwardProblem(object):
         return facts
 
     def _get_effects(self, effects):
-        facts = []
+        # An atom that is both added and deleted becomes a single add, as in the PDDL translator
+        heads = []
+        value_from_head = {}
         cost = 0
         for literal in effects:
             if isinstance(literal, Literal):
                 if literal.head in self.condition_heads:
-                    facts.append(Fact(literal.head, literal.value))
+                    if literal.head not in value_from_head:
+                        heads.append(literal.head)
+                    value_from_head[literal.head] = value_from_head.get(literal.head, False) or literal.value
             elif isinstance(literal, Increase):
                 assert literal.head == TotalCost()
                 if isinstance(literal.value, Head):
@@ -176,7 +188,7 @@ class DownwardProblem(object):
                     cost += literal.value
             else:
                 raise ValueError(literal)
-        return facts, cost
+        return [Fact(head, value_from_head[head]) for head in heads], cost
 
     def _get_actions(self, actions):
         for action in actions:
@@ -214,6 +226,38 @@ class DownwardProblem(object):
                                                                                                                                                   self.goal if (self.goal is None) else len(self.goal))
 
 
+def reachable_operators(initial, actions, axioms):
+    # Relaxed forward reachability over ground actions and axioms
+    state = apply(initial, defaultdict(bool))
+    operators = actions + axioms
+    unsatisfied = []
+    operators_from_pre = defaultdict(list)
+    queue = deque()
+    for i, op in enumerate(operators):
+        needed = {p for p in op.preconditions if not p.holds(state)}
+        unsatisfied.append(len(needed))
+        for p in needed:
+            operators_from_pre[p].append(i)
+        if not needed:
+            queue.append(i)
+    reached = set()
+    reachable = []
+    while queue:
+        i = queue.popleft()
+        reachable.append(i)
+        for e in operators[i].effects:
+            if not isinstance(e, Literal) or (e in reached):
+                continue
+            reached.add(e)
+            for j in operators_from_pre.get(e, []):
+                unsatisfied[j] -= 1
+                if unsatisfied[j] == 0:
+                    queue.append(j)
+    reachable.sort()
+    return [operators[i] for i in reachable if i < len(actions)], \
+           [operators[i] for i in reachable if len(actions) <= i]
+
+
 def convert_solution(solution, problem):
 
     plan = []
@@ -224,18 +268,25 @@ def convert_solution(solution, problem):
     return plan
 
 
-def solve_sas(problem, planner='max-astar', max_time=INF, max_cost=INF, verbose=False, clean=True, temp_dir=TEMP_DIR):
+def solve_sas(problem, planner='max-astar', max_time=INF, max_cost=INF, improve_time=0,
+              verbose=False, clean=True, temp_dir=None, statistics=None):
     if problem.goal is None:
         return None
     if not problem.goal:
         return []
 
-    remove_paths(temp_dir)
-    ensure_dir(temp_dir)
-    write(temp_dir + TRANSLATE_OUTPUT, to_sas(problem))
-    plan = run_search(planner, max_time, max_cost, verbose, temp_dir)
-    if clean:
-        remove_paths(temp_dir)
+    if not has_fast_downward():
+        if not has_python_planner(planner):
+            raise PlannerUnavailable('Environment variable {} is not defined. Without Fast Downward, the planner '
+                                     'must be one of {}, not {}.'.format(ENV_VAR, sorted(PYTHON_PLANNERS), planner))
+        if not is_small(problem):
+            raise PlannerUnavailable('Environment variable {} is not defined. Without Fast Downward, only tasks with '
+                                     'at most {} operators can be solved.'.format(ENV_VAR, MAX_OPERATORS))
+        with phase(statistics, 'search'):
+            return python_search(problem, planner=planner, max_time=max_time, max_cost=max_cost, verbose=verbose)
+    with phase(statistics, 'search'), temp_workspace(temp_dir, clean=clean) as workspace:
+        plan = run_search(partial(iterate_sas, problem), planner, max_time, max_cost, verbose, workspace,
+                          improve_time=improve_time)
     if plan is None:
         return None
     return convert_solution(plan, problem)
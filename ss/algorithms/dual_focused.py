@@ -12,8 +12,9 @@ from ss.algorithms.effort import initialize_effort_functions, add_effort_evaluat
 from ss.model.functions import Increase, infer_evaluations, TotalCost, Atom, Literal, Head, Object
 from ss.model.functions import NegatedAtom
 from ss.model.functions import Predicate
-from ss.model.operators import Operator, Initial, Goal, Axiom
+from ss.model.operators import Operator, Initial, Goal, Axiom, ordered_effects
 from ss.model.problem import get_length, get_cost, state_sequence
+from ss.model.statistics import Statistics
 from ss.utils import INF
 
 
@@ -35,7 +36,7 @@ def literal_sequence(initial, actions):
     state = {}
     for action in [Initial(initial)] + actions:
         assert not action.parameters
-        for atom in action.effects:
+        for atom in ordered_effects(action.effects):
             if isinstance(atom, Literal):
                 atom.assign(state)
         yield state.copy()
@@ -47,8 +48,7 @@ def plan_preimage(universe, evaluations, plan):
     lazy_states = list(literal_sequence(
         universe.evaluations, action_instances))
     real_states = list(literal_sequence(evaluations, action_instances))
-    axiom_instances = [axiom.instantiate(
-        args) for axiom, args in universe.axiom_instances()]
+    axiom_instances = universe.ground_axioms()
     preimage = set()
     remapped_axioms = []
     for rs, ls, action in reversed(zip(real_states, lazy_states, action_instances + [Goal(universe.problem.goal)])):
@@ -143,8 +143,7 @@ def solve_streams_new(universe, evaluations, plan, bound_streams, start_time, ma
         instance.effects = list(instance.effects) + \
             [~OrderPreds[i](), OrderPreds[i + 1]()]
         action_from_instance[instance] = (action, args)
-    axioms = [axiom.instantiate(args)
-              for axiom, args in universe.axiom_instances()]
+    axioms = universe.ground_axioms()
     stream_actions, stream_axioms = stream_action_instances(
         evaluations, bound_streams)
 
@@ -290,9 +289,10 @@ def add_fluent_streams(evaluations, bound_streams, universe, initial_computed=Tr
 
 def dual_focused(problem, max_time=INF, max_cost=INF, terminate_cost=INF, effort_weight=None, solve=False, defer=False,
                  use_context=False, planner='ff-astar', max_planner_time=10, reset_fn=revisit_reset_fn,
-                 bind=False, revisit=False, verbose=False,
+                 bind=False, revisit=False, num_workers=1, verbose=False,
                  verbose_search=False, **kwargs):
     start_time = time.time()
+    statistics = Statistics(problem)
     num_epochs = 1
     num_iterations = 0
     if effort_weight is not None:
@@ -300,6 +300,7 @@ def dual_focused(problem, max_time=INF, max_cost=INF, terminate_cost=INF, effort
         initialize_effort_functions(problem)
     evaluations = infer_evaluations(problem.initial)
     disabled = deque()
+    universe = None
     best_plan = None
     best_cost = INF
     search_time = 0
@@ -320,10 +321,12 @@ def dual_focused(problem, max_time=INF, max_cost=INF, terminate_cost=INF, effort
         real_plan, evaluations = solve_eager(problem, evaluations, solve=(solve and reattempt), planner=planner,
                                              max_time=(
                                                  max_time - (time.time() - start_time)),
-                                             max_cost=min(best_cost, max_cost), verbose=verbose, **kwargs)
+                                             max_cost=min(best_cost, max_cost), verbose=verbose,
+                                             statistics=statistics, **kwargs)
 
         reattempt = False
-        real_cost = get_cost(real_plan, evaluations)
+        with statistics.phase('validation'):
+            real_cost = get_cost(real_plan, evaluations)
         if real_cost < best_cost:
 
             best_plan = real_plan
@@ -333,16 +336,21 @@ def dual_focused(problem, max_time=INF, max_cost=INF, terminate_cost=INF, effort
 
         if has_fluent_streams:
             add_computed_evals(evaluations)
-        universe = Universe(problem, evaluations,
-                            use_bounds=True, only_eager=False)
+        with statistics.phase('universe'):
+            if universe is None:
+                universe = Universe(problem, evaluations, use_bounds=True,
+                                    only_eager=False, persistent=True)
+            else:
+                universe.update(evaluations)
         if not all(f.eager for f in universe.defined_functions):
             raise NotImplementedError(
                 'Non-eager functions are not yet supported')
-        bound_streams = bound_stream_instances(universe)
-        if effort_weight is not None:
-            add_effort_evaluations(evaluations, universe, bound_streams)
-        if has_fluent_streams:
-            add_fluent_streams(evaluations, bound_streams, universe)
+        with statistics.phase('bounds'):
+            bound_streams = bound_stream_instances(universe)
+            if effort_weight is not None:
+                add_effort_evaluations(evaluations, universe, bound_streams)
+            if has_fluent_streams:
+                add_fluent_streams(evaluations, bound_streams, universe)
 
         mt = (max_time - (time.time() - start_time))
         if disabled:
@@ -350,15 +358,17 @@ def dual_focused(problem, max_time=INF, max_cost=INF, terminate_cost=INF, effort
         t0 = time.time()
 
         opt_plan = solve_universe(universe, planner=planner, max_time=mt,
-                                  max_cost=min(best_cost, max_cost), verbose=verbose_search, **kwargs)
+                                  max_cost=min(best_cost, max_cost), verbose=verbose_search,
+                                  statistics=statistics, **kwargs)
         search_time += (time.time() - t0)
         if verbose:
             print 'Actions | Length: {} | Cost: {} | {}'.format(get_length(opt_plan, universe.evaluations),
                                                                 get_cost(opt_plan, universe.evaluations), opt_plan)
 
         if use_context:
-            success, negative_atoms = evaluate_negative_atoms(
-                universe, evaluations, opt_plan)
+            with statistics.phase('streams'):
+                success, negative_atoms = evaluate_negative_atoms(
+                    universe, evaluations, opt_plan)
             if verbose:
                 print 'External | Success: {} | {}'.format(success, negative_atoms)
         else:
@@ -367,34 +377,40 @@ def dual_focused(problem, max_time=INF, max_cost=INF, terminate_cost=INF, effort
         t0 = time.time()
         solve_streams_fn = solve_streams_new if (
             defer or has_fluent_streams) else solve_streams
-        stream_plan, action_plan = solve_streams_fn(
-            universe, evaluations, opt_plan, bound_streams, start_time, max_time, defer, **kwargs)
+        with statistics.phase('stream_planning'):
+            stream_plan, action_plan = solve_streams_fn(
+                universe, evaluations, opt_plan, bound_streams, start_time, max_time, defer, **kwargs)
         stream_time += (time.time() - t0)
         if verbose:
             print 'Streams | Length: {} | {}'.format(get_length(stream_plan, []), stream_plan)
 
         if stream_plan:
-            if revisit:
-                isolated_reset_fn(disabled, evaluations)
+            with statistics.phase('streams'):
+                if revisit:
+                    isolated_reset_fn(disabled, evaluations)
 
-            if bind:
+                if bind:
 
-                reattempt = multi_bind_call_streams(
-                    evaluations, disabled, stream_plan, negative_atoms, verbose=verbose)
-            else:
-                reattempt = call_streams(
-                    evaluations, disabled, stream_plan, negative_atoms, verbose=verbose)
+                    reattempt = multi_bind_call_streams(
+                        evaluations, disabled, stream_plan, negative_atoms, verbose=verbose)
+                else:
+                    reattempt = call_streams(
+                        evaluations, disabled, stream_plan, negative_atoms, num_workers=num_workers,
+                        max_time=max_time - (time.time() - start_time), verbose=verbose)
             if verbose:
                 print 'Reattempt:', reattempt
             continue
 
-        cost = get_cost(action_plan, universe.evaluations)
+        with statistics.phase('validation'):
+            cost = get_cost(action_plan, universe.evaluations)
         if success and (stream_plan is not None) and (cost < best_cost):
             best_plan = action_plan
             best_cost = cost
         if (best_cost < terminate_cost) or not disabled:
             break
 
-        reset_fn(disabled, evaluations)
+        with statistics.phase('streams'):
+            reset_fn(disabled, evaluations)
         num_epochs += 1
-    return best_plan, evaluations
+    statistics.update(iterations=num_iterations, epochs=num_epochs, evaluations=len(evaluations))
+    return best_plan, evaluations, statistics
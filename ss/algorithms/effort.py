@@ -1,8 +1,6 @@
 from collections import namedtuple, defaultdict
 from heapq import heappop, heappush
-from itertools import product
 
-from ss.algorithms.universe import get_mapping
 from ss.model.functions import Atom, TotalCost, Function, Increase, initialize
 
 Node = namedtuple('Node', ['effort', 'stream'])
@@ -60,12 +58,7 @@ def add_effort_evaluations(evaluations, universe, bound_streams, operation=sum):
     node_from_atom = determine_atom_effort(
         evaluations, bound_streams, op=operation)
     for action in universe.problem.actions:
-        values = [universe.atoms_from_predicate.get(
-            a.head.function, {}) for a in action._stream_atoms]
-        for combo in product(*values):
-            mapping = get_mapping(action._stream_atoms, combo)
-            if mapping is None:
-                continue
+        for mapping in universe.mappings(action._stream_atoms):
             ground_atoms = [a.substitute(mapping)
                             for a in action._stream_atoms]
             cost = 1
@@ -1,10 +1,21 @@
 from time import time
-from ss.utils import INF
+from itertools import count
+from multiprocessing import cpu_count
+from ss.utils import INF, LRUCache
+from ss.algorithms.search_pool import SearchPool, wait_any
+from ss.model.statistics import phase
 import sys
 import os
+import re
+import shlex
 import shutil
+import tempfile
+from contextlib import contextmanager
+from StringIO import StringIO
 
 TEMP_DIR = 'temp/'
+SHM_DIR = '/dev/shm'
+WORKSPACE_PREFIX = 'ss-'
 DOMAIN_INPUT = 'domain.pddl'
 PROBLEM_INPUT = 'problem.pddl'
 TRANSLATE_OUTPUT = 'output.sas'
@@ -13,7 +24,10 @@ SEARCH_OUTPUT = 'sas_plan'
 ENV_VAR = 'FD_PATH'
 FD_BIN = 'bin'
 TRANSLATE_DIR = 'translate/'
-SEARCH_COMMAND = 'downward --internal-plan-file %s %s < %s'
+SEARCH_BINARY = 'downward'
+SEARCH_POOL = None
+PLAN_IDS = count()
+DOMAIN_CACHE = LRUCache(max_size=16)
 
 
 SEARCH_OPTIONS = {
@@ -53,6 +67,8 @@ SEARCH_OPTIONS = {
     '--search "lazy_greedy([hff],preferred=[hff],max_time=%s,bound=%s)"',
 }
 
+PORTFOLIO = ['ff-astar', 'ff-wastar3', 'cea-wastar3', 'ff-eager-pref', 'ff-lazy']
+
 
 def read(filename):
     with open(filename, 'r') as f:
@@ -85,14 +101,37 @@ def safe_rm_dir(d):
         shutil.rmtree(d)
 
 
+def get_temp_root():
+    if os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK):
+        return SHM_DIR
+    return tempfile.gettempdir()
+
+
+@contextmanager
+def temp_workspace(temp_dir=None, clean=True):
+    if temp_dir is None:
+        workspace = tempfile.mkdtemp(prefix=WORKSPACE_PREFIX, dir=get_temp_root())
+    else:
+        workspace = os.path.abspath(temp_dir)
+        ensure_dir(os.path.join(workspace, ''))
+    try:
+        yield workspace
+    finally:
+        if clean:
+            safe_rm_dir(workspace)
+
+
+def has_fast_downward():
+    return ENV_VAR in os.environ
+
+
 def get_fd_root():
     if ENV_VAR not in os.environ:
         raise RuntimeError('Environment variable %s is not defined.' % ENV_VAR)
     return os.environ[ENV_VAR]
 
 
-def run_translate(verbose, temp_dir, use_negative=False):
-    t0 = time()
+def load_translate(use_negative=False):
     translate_path = os.path.join(get_fd_root(), FD_BIN, TRANSLATE_DIR)
     if translate_path not in sys.path:
         sys.path.append(translate_path)
@@ -103,33 +142,52 @@ def run_translate(verbose, temp_dir, use_negative=False):
         translate_flags = []
 
     temp_argv = sys.argv[:]
-
     sys.argv = sys.argv[:1] + translate_flags + [DOMAIN_INPUT, PROBLEM_INPUT]
-    import translate
-    sys.argv = temp_argv
+    try:
+        import translate
+    finally:
+        sys.argv = temp_argv
+    return translate
+
+
+def parse_pddl(pddl):
+    from pddl_parser.lisp_parser import parse_nested_list
+    return parse_nested_list(pddl.splitlines())
+
+
+def translate_task(translate, domain_pddl, problem_pddl):
+    from pddl_parser.parsing_functions import parse_task
+    domain = DOMAIN_CACHE.get(domain_pddl)
+    if domain is None:
+        domain = parse_pddl(domain_pddl)
+        DOMAIN_CACHE[domain_pddl] = domain
+    task = parse_task(domain, parse_pddl(problem_pddl))
+    translate.normalize.normalize(task)
+    sas_task = translate.pddl_to_sas(task)
+    output = StringIO()
+    sas_task.output(output)
+    return output.getvalue()
 
-    old_cwd = os.getcwd()
-    tmp_cwd = os.path.join(old_cwd, temp_dir)
+
+def run_translate(domain_pddl, problem_pddl, verbose=False, use_negative=False):
+    t0 = time()
+    translate = load_translate(use_negative)
     if verbose:
-        print '\nTranslate command: import translate; translate.main()'
-        os.chdir(tmp_cwd)
-        translate.main()
-        os.chdir(old_cwd)
+        print '\nTranslate command: translate.pddl_to_sas(task)'
+        sas = translate_task(translate, domain_pddl, problem_pddl)
         print 'Translate runtime:', time() - t0
-        return
+        return sas
 
     with open(os.devnull, 'w') as devnull:
         old_stdout = sys.stdout
         sys.stdout = devnull
-        os.chdir(tmp_cwd)
         try:
-            translate.main()
+            return translate_task(translate, domain_pddl, problem_pddl)
         finally:
             sys.stdout = old_stdout
-            os.chdir(old_cwd)
 
 
-def run_search(planner, max_time, max_cost, verbose, temp_dir):
+def search_command(planner, max_time, max_cost, plan_path):
     if max_time == INF:
         max_time = 'infinity'
     elif isinstance(max_time, float):
@@ -138,22 +196,89 @@ def run_search(planner, max_time, max_cost, verbose, temp_dir):
         max_cost = 'infinity'
     elif isinstance(max_cost, float):
         max_cost = int(max_cost)
-
-    t0 = time()
-    search = os.path.join(get_fd_root(), FD_BIN, SEARCH_COMMAND)
+    search = os.path.join(get_fd_root(), FD_BIN, SEARCH_BINARY)
     planner_config = SEARCH_OPTIONS[planner] % (max_time, max_cost)
-    command = search % (temp_dir + SEARCH_OUTPUT,
-                        planner_config, temp_dir + TRANSLATE_OUTPUT)
+    return [search, '--internal-plan-file', plan_path] + shlex.split(planner_config)
+
+
+def get_search_pool():
+    global SEARCH_POOL
+    if SEARCH_POOL is None:
+        SEARCH_POOL = SearchPool(max_workers=cpu_count())
+    return SEARCH_POOL
+
+
+def search_plan_path(temp_dir):
+    return os.path.join(temp_dir, '{}.{}.{}'.format(SEARCH_OUTPUT, os.getpid(), next(PLAN_IDS)))
+
+
+def run_search(sas, planner, max_time, max_cost, verbose, temp_dir, improve_time=0, pool=None):
+    if planner == 'portfolio':
+        planner = PORTFOLIO
+    if isinstance(planner, (list, tuple)):
+        return run_portfolio(sas, planner, max_time, max_cost, verbose, temp_dir,
+                             improve_time=improve_time, pool=pool)
+    if pool is None:
+        pool = get_search_pool()
+    plan_path = search_plan_path(temp_dir)
+    command = search_command(planner, max_time, max_cost, plan_path)
     if verbose:
-        print '\nSearch command:', command
-    p = os.popen(command)
-    output = p.read()
+        print '\nSearch command:', ' '.join(command)
+    search = pool.submit(command, sas, plan_path, max_time=max_time)
+    try:
+        search.wait()
+    finally:
+        search.cancel()
     if verbose:
-        print output[:-1]
-        print 'Search runtime:', time() - t0
-    if not os.path.exists(temp_dir + SEARCH_OUTPUT):
-        return None
-    return read(temp_dir + SEARCH_OUTPUT)
+        print search.output[:-1]
+        print 'Search runtime: {:.3f} | Exit code: {}'.format(search.runtime, search.returncode)
+    solution = search.read_plan()
+    safe_rm_file(plan_path)
+    return solution
+
+
+def run_portfolio(sas, planners, max_time, max_cost, verbose, temp_dir, improve_time=0, pool=None):
+    if pool is None:
+        pool = get_search_pool()
+    planner_from_search = {}
+    for planner in planners:
+        plan_path = search_plan_path(temp_dir)
+        command = search_command(planner, max_time, max_cost, plan_path)
+        if verbose:
+            print '\nSearch command:', ' '.join(command)
+        planner_from_search[pool.submit(command, sas, plan_path, max_time=max_time)] = planner
+
+    best_solution, best_cost = None, INF
+    deadline = None
+    running = list(planner_from_search)
+    try:
+        while running:
+            timeout = None if deadline is None else max(deadline - time(), 0)
+            for search in wait_any(running, timeout=timeout):
+                running.remove(search)
+                solution = search.read_plan()
+                cost = INF if solution is None else parse_cost(solution)
+                if verbose:
+                    print 'Planner: {} | Runtime: {:.3f} | Exit code: {} | Cost: {}'.format(
+                        planner_from_search[search], search.runtime, search.returncode, cost)
+                if cost < best_cost:
+                    best_solution, best_cost = solution, cost
+                    if deadline is None:
+                        deadline = time() + improve_time
+            if (deadline is not None) and (deadline <= time()):
+                break
+    finally:
+        for search in planner_from_search:
+            search.cancel()
+            safe_rm_file(search.plan_path)
+    return best_solution
+
+
+def parse_cost(solution):
+    match = re.search(r'; cost = (\d+)', solution)
+    if match is None:
+        return len(parse_solution(solution))
+    return int(match.group(1))
 
 
 def parse_solution(solution):
@@ -165,21 +290,13 @@ def parse_solution(solution):
     return plan
 
 
-def remove_paths(temp_dir):
-
-    safe_rm_dir(temp_dir)
-
-
-def fast_downward(domain_pddl, problem_pddl, planner='max-astar',
-                  max_time=INF, max_cost=INF, verbose=False, clean=False, temp_dir=TEMP_DIR):
-    remove_paths(temp_dir)
-    ensure_dir(temp_dir)
-    write(temp_dir + DOMAIN_INPUT, domain_pddl)
-    write(temp_dir + PROBLEM_INPUT, problem_pddl)
-    run_translate(verbose, temp_dir)
-    solution = run_search(planner, max_time, max_cost, verbose, temp_dir)
-    if clean:
-        remove_paths(temp_dir)
+def fast_downward(domain_pddl, problem_pddl, planner='max-astar', max_time=INF, max_cost=INF,
+                  improve_time=0, verbose=False, clean=True, temp_dir=None, statistics=None):
+    with phase(statistics, 'translate'):
+        sas = run_translate(domain_pddl, problem_pddl, verbose)
+    with phase(statistics, 'search'), temp_workspace(temp_dir, clean=clean) as workspace:
+        solution = run_search(sas, planner, max_time, max_cost, verbose, workspace,
+                              improve_time=improve_time)
     if solution is None:
         return None
     return parse_solution(solution)
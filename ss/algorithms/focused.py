@@ -1,5 +1,5 @@
 import time
-from collections import defaultdict, deque
+from collections import deque
 
 from ss.algorithms.effort import initialize_effort_functions, add_effort_evaluations
 from ss.algorithms.incremental import solve_universe
@@ -7,9 +7,11 @@ from ss.algorithms.focused_utils import evaluate_eager, isolated_reset_fn, revis
 from ss.algorithms.universe import Universe
 from ss.algorithms.focused_utils import BoundStream
 from ss.model.functions import Literal, Increase, infer_evaluations, Head
-from ss.model.problem import get_cost, get_length, supporting_axioms
-from ss.model.operators import apply, Operator
+from ss.model.problem import get_cost, get_length
+from ss.model.operators import Operator, ordered_effects
+from ss.model.simulator import StateSimulator
 from ss.model.streams import StreamInstance
+from ss.model.statistics import Statistics
 from ss.utils import INF
 
 
@@ -34,17 +36,15 @@ def bound_stream_instances(universe):
 def required_heads(universe, plan):
 
     actions = [action.instantiate(args) for action, args in plan]
-    axioms = [axiom.instantiate(args)
-              for axiom, args in universe.axiom_instances()]
     goal = Operator([], universe.problem.goal, [])
-    state = apply(universe.evaluations, defaultdict(bool))
+    simulator = StateSimulator(universe.evaluations, universe.ground_axioms())
 
     heads = set()
     image = {}
     for act in actions + [goal]:
         preconditions = {
             p for p in act.preconditions if not universe.is_derived(p)}
-        for ax in supporting_axioms(state, act.preconditions, axioms):
+        for ax in simulator.supporting_axioms(act.preconditions):
             preconditions.update(
                 p for p in ax.preconditions if not universe.is_derived(p))
 
@@ -55,7 +55,7 @@ def required_heads(universe, plan):
                 assert image[p.head] == p.value
             else:
                 heads.update(p.heads())
-        for e in act.effects:
+        for e in ordered_effects(act.effects):
             if isinstance(e, Literal):
                 image[e.head] = e.value
             elif isinstance(e, Increase):
@@ -63,7 +63,7 @@ def required_heads(universe, plan):
                 heads.update(e.heads())
             else:
                 raise NotImplementedError(e)
-        state = act.apply(state)
+        simulator.apply(act)
     return heads
 
 
@@ -88,6 +88,7 @@ def focused(problem, planner='ff-astar', max_planner_time=10, max_time=INF, max_
             single=False, reset_fn=revisit_reset_fn, verbose=False):
 
     start_time = time.time()
+    statistics = Statistics(problem)
     num_epochs = 0
     num_iterations = 0
     if effort_weight is not None:
@@ -95,52 +96,65 @@ def focused(problem, planner='ff-astar', max_planner_time=10, max_time=INF, max_
         initialize_effort_functions(problem)
     evaluations = infer_evaluations(problem.initial)
     disabled = deque()
+    universe = None
     while (time.time() - start_time) < max_time:
         num_iterations += 1
         print '\nEpoch: {} | Iteration: {} | Time: {:.3f}'.format(num_epochs, num_iterations, time.time() - start_time)
 
-        evaluations = evaluate_eager(problem, evaluations)
-        universe = Universe(problem, evaluations,
-                            use_bounds=True, only_eager=False)
+        with statistics.phase('streams'):
+            evaluations = evaluate_eager(problem, evaluations)
+        with statistics.phase('universe'):
+            if universe is None:
+                universe = Universe(problem, evaluations, use_bounds=True,
+                                    only_eager=False, persistent=True)
+            else:
+                universe.update(evaluations)
 
-        stream_from_head, bound_streams = bound_stream_instances(universe)
-        if effort_weight is not None:
-            add_effort_evaluations(evaluations, universe, bound_streams)
+        with statistics.phase('bounds'):
+            stream_from_head, bound_streams = bound_stream_instances(universe)
+            if effort_weight is not None:
+                add_effort_evaluations(evaluations, universe, bound_streams)
         mt = (max_time - (time.time() - start_time))
         if disabled:
             mt = min(max_planner_time, mt)
         plan = solve_universe(universe, planner=planner,
-                              max_time=mt, max_cost=max_cost, verbose=verbose)
+                              max_time=mt, max_cost=max_cost, verbose=verbose, statistics=statistics)
         print 'Length: {} | Cost: {}'.format(get_length(plan, universe.evaluations),
                                              get_cost(plan, universe.evaluations))
         print 'Plan:', plan
         if plan is None:
             if not disabled:
                 break
-            reset_fn(disabled, evaluations)
+            with statistics.phase('streams'):
+                reset_fn(disabled, evaluations)
             num_epochs += 1
             continue
-        evaluated = {e.head for e in evaluations}
-        supporting_heads = required_heads(universe, plan)
+        with statistics.phase('validation'):
+            evaluated = {e.head for e in evaluations}
+            supporting_heads = required_heads(universe, plan)
 
-        useful_streams = retrace_streams(
-            stream_from_head, evaluated, supporting_heads)
+            useful_streams = retrace_streams(
+                stream_from_head, evaluated, supporting_heads)
 
         print useful_streams
         evaluable_streams = filter(lambda s: set(
             s.domain()) <= evaluations, useful_streams)
 
         if not evaluable_streams:
-            return plan, evaluations
+            statistics.update(iterations=num_iterations, epochs=num_epochs, evaluations=len(evaluations))
+            return plan, evaluations, statistics
         if single:
             evaluable_streams = evaluable_streams[:1]
 
-        for instance in evaluable_streams:
-            if isinstance(instance, Head):
-                evaluations.update(infer_evaluations([instance.get_eval()]))
-            elif not instance.enumerated:
-                evaluations.update(infer_evaluations(instance.next_atoms()))
-                instance.disabled = True
-                disabled.append(instance)
-
-    return None, evaluations
+        with statistics.phase('streams'):
+            for instance in evaluable_streams:
+                if isinstance(instance, Head):
+                    evaluations.update(infer_evaluations([instance.get_eval()]))
+                elif not instance.enumerated:
+                    evaluations.update(infer_evaluations(instance.next_atoms(
+                        max_time=max_time - (time.time() - start_time))))
+                    instance.disabled = True
+                    disabled.append(instance)
+
+    statistics.update(iterations=num_iterations, epochs=num_epochs, evaluations=len(evaluations))
+    return None, evaluations, statistics
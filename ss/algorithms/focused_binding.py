@@ -1,8 +1,11 @@
-from collections import defaultdict
+import time
+from collections import defaultdict, deque
 from itertools import product
 
 from ss.algorithms.focused_utils import disable_stream
+from ss.algorithms.stream_evaluator import StreamEvaluator
 from ss.model.streams import Context
+from ss.utils import INF
 
 
 def get_context(bound_stream, external_conditions):
@@ -12,23 +15,41 @@ def get_context(bound_stream, external_conditions):
     return Context(bound_stream.bound_outputs, conditions)
 
 
-def call_streams(evaluations, disabled, bound_streams, external, eager_fail=False, verbose=True):
+def next_atoms(instance, context, deadline=INF):
+    return instance.next_atoms(context=context, max_time=deadline - time.time())
+
+
+def call_streams(evaluations, disabled, bound_streams, external, eager_fail=False, num_workers=1, max_time=INF,
+                 verbose=True):
+    # Streams whose domain already holds are called concurrently, and results are merged in plan order
     success = True
-    for i, bs in enumerate(bound_streams):
-        instance = bs.stream
-        if set(instance.domain()) <= evaluations:
-            new_atoms = instance.next_atoms(context=get_context(bs, external))
-            if not new_atoms:
+    queue = deque(enumerate(bound_streams))
+    evaluator = StreamEvaluator(num_workers)
+    deadline = time.time() + max_time
+    while True:
+        if queue and not evaluator.full():
+            i, bs = queue[0]
+            instance = bs.stream
+            if set(instance.domain()) <= evaluations:
+                queue.popleft()
+                evaluator.submit((i, instance), next_atoms, instance, get_context(bs, external), deadline)
+                continue
+            if not evaluator:
+                queue.popleft()
                 success = False
-                if eager_fail:
-                    break
-            evaluations.update(new_atoms)
-            disable_stream(disabled, instance)
-            if verbose:
-                print i + 1, instance, new_atoms
-        else:
+                continue
+        if not evaluator:
+            break
+        (i, instance), new_atoms = evaluator.next_result()
+        if not new_atoms:
             success = False
-
+            if eager_fail:
+                # Calls still in flight are left to finish, and their results are ignored
+                break
+        evaluations.update(new_atoms)
+        disable_stream(disabled, instance)
+        if verbose:
+            print i + 1, instance, new_atoms
     return success
 
 
@@ -4,6 +4,7 @@ from collections import defaultdict
 from heapq import heappush, heappop
 from ss.model.functions import Atom
 from ss.model.problem import initialize, instantiate_plan
+from ss.model.statistics import phase
 from ss.algorithms.incremental import solve_universe
 
 
@@ -37,15 +38,16 @@ def evaluate_eager(problem, evaluations):
     return eager_universe.evaluations
 
 
-def solve_eager(problem, evaluations, solve, **kwargs):
-    eager_universe = Universe(problem, evaluations,
-                              use_bounds=False, only_eager=True)
-    evaluate_stream_instances(
-        eager_universe.stream_queue, eager_universe.evaluations, INF)
+def solve_eager(problem, evaluations, solve, statistics=None, **kwargs):
+    with phase(statistics, 'streams'):
+        eager_universe = Universe(problem, evaluations,
+                                  use_bounds=False, only_eager=True)
+        evaluate_stream_instances(
+            eager_universe.stream_queue, eager_universe.evaluations, INF)
 
     if not solve:
         return None, eager_universe.evaluations
-    return solve_universe(eager_universe, **kwargs), eager_universe.evaluations
+    return solve_universe(eager_universe, statistics=statistics, **kwargs), eager_universe.evaluations
 
 
 def isolated_reset_fn(disabled, evaluations):
@@ -1,70 +1,124 @@
 import time
 
-from ss.algorithms.fast_downward import fast_downward
-from ss.algorithms.downward import DownwardProblem, solve_sas
+from ss.algorithms.fast_downward import fast_downward, has_fast_downward
+from ss.algorithms.downward import DownwardProblem, solve_sas, reachable_operators
 from ss.algorithms.universe import Universe
+from ss.algorithms.stream_evaluator import StreamEvaluator
 from ss.utils import INF
 from ss.model.problem import get_cost
+from ss.model.statistics import Statistics, phase
 from ss.algorithms.tpshe import tpshe
 from ss.algorithms.tfd import tfd
 from ss.algorithms.smtplan import smtplan
 
 
-def evaluate_stream_instances(universe, max_evals, start_time, max_time, verbose=False):
+def next_atoms(batch, deadline=INF):
+    if len(batch) == 1:
+        return [batch[0].next_atoms(max_time=deadline - time.time())]
+    if deadline <= time.time():
+        # Batches are not supervised, so one that starts after the deadline is left queued instead
+        return [[] for _ in batch]
+    return batch[0].stream.next_atoms_batch(batch)
+
+
+def evaluate_stream_instances(universe, max_evals, start_time, max_time, verbose=False, num_workers=1):
     num_evals = 0
-    while universe.stream_queue and (num_evals < max_evals) and ((time.time() - start_time) < max_time):
-        num_evals += 1
-        instance = universe.stream_queue.popleft()
-        new_atoms = instance.next_atoms()
-        if verbose:
-            print instance, new_atoms
-        for eval in new_atoms:
-            universe.add_eval(eval)
-        if not instance.enumerated:
-            universe.stream_queue.append(instance)
+    evaluator = StreamEvaluator(num_workers)
+    while True:
+        while universe.stream_queue and not evaluator.full() and (num_evals < max_evals) and \
+                ((time.time() - start_time) < max_time):
+            batch = universe.next_batch(max_evals - num_evals)
+            num_evals += len(batch)
+            evaluator.submit(batch, next_atoms, batch, start_time + max_time)
+        if not evaluator:
+            break
+        batch, batch_atoms = evaluator.next_result()
+        for instance, new_atoms in zip(batch, batch_atoms):
+            if verbose:
+                print instance, new_atoms
+            for eval in new_atoms:
+                universe.add_eval(eval)
+            if not instance.enumerated:
+                universe.stream_queue.append(instance)
 
 
-def solve_universe(universe, **kwargs):
+GROUNDINGS = ['sas', 'pddl', 'compare']
 
+
+def solve_universe(universe, statistics=None, grounding='sas', **kwargs):
     if not universe.problem.goal:
         return []
-
-    domain_pddl, problem_pddl = universe.pddl()
     if universe.problem.is_temporal():
-        plan = tpshe(domain_pddl, problem_pddl, **kwargs)
-
-    else:
-        plan = fast_downward(domain_pddl, problem_pddl, **kwargs)
+        with phase(statistics, 'pddl'):
+            domain_pddl, problem_pddl = universe.pddl()
+        with phase(statistics, 'search'):
+            plan = tpshe(domain_pddl, problem_pddl, **kwargs)
+        return universe.convert_plan(plan)
+    if grounding not in GROUNDINGS:
+        raise ValueError('Unknown grounding {}. Options: {}'.format(grounding, GROUNDINGS))
+    if (grounding == 'sas') or not has_fast_downward():
+        return solve_universe_manual(universe, statistics=statistics, **kwargs)
+    if grounding == 'pddl':
+        return solve_universe_pddl(universe, statistics=statistics, **kwargs)
+    return compare_groundings(universe, statistics=statistics, **kwargs)
+
+
+def solve_universe_pddl(universe, statistics=None, **kwargs):
+    if not universe.problem.goal:
+        return []
+    with phase(statistics, 'pddl'):
+        domain_pddl, problem_pddl = universe.pddl()
+    plan = fast_downward(domain_pddl, problem_pddl, statistics=statistics, **kwargs)
     return universe.convert_plan(plan)
 
 
-def solve_universe_manual(universe, **kwargs):
+def solve_universe_manual(universe, statistics=None, **kwargs):
     if not universe.problem.goal:
         return []
 
-    action_mapping = {action.instantiate(args): (
-        action, args) for action, args in universe.action_instances()}
-    action_instances = action_mapping.keys()
-    axiom_instances = [axiom.instantiate(
-        args) for axiom, args in universe.axiom_instances()]
+    with phase(statistics, 'ground'):
+        action_instances = []
+        action_mapping = {}
+        for action, args in universe.action_instances():
+            instance = universe.ground(action, args)
+            action_instances.append(instance)
+            action_mapping[instance] = (action, args)
+        action_instances, axiom_instances = reachable_operators(
+            universe.evaluations, action_instances, universe.ground_axioms())
     print 'Actions: {} | Axioms: {}'.format(len(action_instances), len(axiom_instances))
-    problem = DownwardProblem(
-        universe.evaluations, universe.problem.goal, action_instances, axiom_instances)
+    with phase(statistics, 'translate'):
+        problem = DownwardProblem(
+            universe.evaluations, universe.problem.goal, action_instances, axiom_instances)
 
-    plan = solve_sas(problem, **kwargs)
+    plan = solve_sas(problem, statistics=statistics, **kwargs)
     if plan is None:
         return None
     return [action_mapping[ai] for ai in plan]
 
 
+def compare_groundings(universe, statistics=None, **kwargs):
+    sas_plan = solve_universe_manual(universe, statistics=statistics, **kwargs)
+    pddl_plan = solve_universe_pddl(universe, statistics=statistics, **kwargs)
+    for name, plan in [('sas', sas_plan), ('pddl', pddl_plan)]:
+        if (plan is not None) and not universe.is_solution(plan):
+            raise RuntimeError('Invalid {} plan: {}'.format(name, plan))
+    sas_cost = get_cost(sas_plan, universe.evaluations)
+    pddl_cost = get_cost(pddl_plan, universe.evaluations)
+    if sas_cost != pddl_cost:
+        print 'Grounding mismatch | SAS cost: {} | PDDL cost: {}'.format(sas_cost, pddl_cost)
+    return sas_plan
+
+
 def incremental(problem, max_time=INF, max_cost=INF, terminate_cost=INF, planner='ff-astar',
-                max_planner_time=10, verbose=False, verbose_search=False):
+                max_planner_time=10, queue='fifo', num_workers=1, verbose=False, verbose_search=False):
 
     start_time = time.time()
+    statistics = Statistics(problem)
     search_time = 0
     num_iterations = 0
-    universe = Universe(problem, problem.initial,
-                        use_bounds=False, only_eager=False)
+    with statistics.phase('universe'):
+        universe = Universe(problem, problem.initial,
+                            use_bounds=False, only_eager=False, queue=queue)
     best_plan = None
     best_cost = INF
     while (time.time() - start_time) < max_time:
@@ -76,9 +130,10 @@ def incremental(problem, max_time=INF, max_cost=INF, terminate_cost=INF, planner
         plan = solve_universe(universe, planner=planner,
                               max_time=min(max_planner_time,
                                            (max_time - elapsed_time)),
-                              max_cost=min(best_cost, max_cost), verbose=verbose_search)
+                              max_cost=min(best_cost, max_cost), verbose=verbose_search, statistics=statistics)
         search_time += (time.time() - t0)
-        cost = get_cost(plan, universe.evaluations)
+        with statistics.phase('validation'):
+            cost = get_cost(plan, universe.evaluations)
         if cost < best_cost:
             best_plan = plan
             best_cost = cost
@@ -86,32 +141,43 @@ def incremental(problem, max_time=INF, max_cost=INF, terminate_cost=INF, planner
             break
         if not universe.stream_queue:
             break
-        evaluate_stream_instances(universe, len(
-            universe.stream_queue), start_time, max_time, verbose=verbose)
-    return best_plan, universe.evaluations
+        with statistics.phase('streams'):
+            evaluate_stream_instances(universe, len(
+                universe.stream_queue), start_time, max_time, verbose=verbose, num_workers=num_workers)
+    statistics.update(iterations=num_iterations, evaluations=len(universe.evaluations))
+    return best_plan, universe.evaluations, statistics
 
 
-def exhaustive(problem, max_time=INF, max_cost=INF, search_time=5, verbose=False, verbose_search=False):
+def exhaustive(problem, max_time=INF, max_cost=INF, search_time=5, queue='fifo', num_workers=1, verbose=False,
+               verbose_search=False):
     stream_time = max_time - search_time
     start_time = time.time()
+    statistics = Statistics(problem)
     last_print = time.time()
-    universe = Universe(problem, problem.initial,
-                        use_bounds=False, only_eager=False)
+    with statistics.phase('universe'):
+        universe = Universe(problem, problem.initial,
+                            use_bounds=False, only_eager=False, queue=queue)
     while universe.stream_queue and ((time.time() - start_time) < stream_time):
-        evaluate_stream_instances(
-            universe, 1, start_time, max_time, verbose=verbose)
+        with statistics.phase('streams'):
+            evaluate_stream_instances(
+                universe, num_workers, start_time, max_time, verbose=verbose, num_workers=num_workers)
         if 5 <= (time.time() - last_print):
             print 'Evaluations: {} | Total time: {:.3f}'.format(len(universe.evaluations), (time.time() - start_time))
             last_print = time.time()
     plan = solve_universe(universe, max_time=search_time,
-                          max_cost=max_cost, verbose=verbose_search)
-    return plan, universe.evaluations
-
-
-def finite(problem, max_cost=INF, search_time=INF, verbose=False):
-    universe = Universe(problem, problem.initial,
-                        use_bounds=False, only_eager=False)
-    evaluate_stream_instances(universe, INF, time.time(), INF, verbose=verbose)
+                          max_cost=max_cost, verbose=verbose_search, statistics=statistics)
+    statistics.update(evaluations=len(universe.evaluations))
+    return plan, universe.evaluations, statistics
+
+
+def finite(problem, max_cost=INF, search_time=INF, queue='fifo', num_workers=1, verbose=False):
+    statistics = Statistics(problem)
+    with statistics.phase('universe'):
+        universe = Universe(problem, problem.initial,
+                            use_bounds=False, only_eager=False, queue=queue)
+    with statistics.phase('streams'):
+        evaluate_stream_instances(universe, INF, time.time(), INF, verbose=verbose, num_workers=num_workers)
     plan = solve_universe(universe, max_time=search_time,
-                          max_cost=max_cost, verbose=verbose)
-    return plan, universe.evaluations
+                          max_cost=max_cost, verbose=verbose, statistics=statistics)
+    statistics.update(evaluations=len(universe.evaluations))
+    return plan, universe.evaluations, statistics
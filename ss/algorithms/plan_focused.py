@@ -8,6 +8,7 @@ from ss.algorithms.universe import Universe
 from ss.model.functions import Predicate, Increase, infer_evaluations, TotalCost
 from ss.model.operators import Action
 from ss.model.problem import Problem, get_length, get_cost
+from ss.model.statistics import Statistics
 from ss.utils import INF
 from ss.algorithms.focused_binding import call_streams, multi_bind_call_streams
 
@@ -121,8 +122,9 @@ def detangle_plan(evaluations, plan):
 
 def plan_focused(problem, max_time=INF, max_cost=INF, terminate_cost=INF, effort_weight=1,
                  planner='ff-astar', max_planner_time=10, reset_fn=revisit_reset_fn, bind=False,
-                 verbose=False, verbose_search=False, defer=False):
+                 num_workers=1, verbose=False, verbose_search=False, defer=False):
     start_time = time.time()
+    statistics = Statistics(problem)
     num_iterations = 0
     num_epochs = 1
     if effort_weight is not None:
@@ -131,6 +133,7 @@ def plan_focused(problem, max_time=INF, max_cost=INF, terminate_cost=INF, effort
             action.effects = action.effects + (Increase(TotalCost(), 1),)
     evaluations = infer_evaluations(problem.initial)
     disabled = deque()
+    universe = None
 
     stream_actions, stream_axioms = make_stream_operators(
         problem, effort_weight)
@@ -141,25 +144,34 @@ def plan_focused(problem, max_time=INF, max_cost=INF, terminate_cost=INF, effort
     while (time.time() - start_time) < max_time:
         num_iterations += 1
         print '\nEpoch: {} | Iteration: {} | Disabled: {} | Cost: {} | '              'Time: {:.3f}'.format(num_epochs, num_iterations, len(disabled), best_cost, time.time() - start_time)
-        evaluations = evaluate_eager(problem, evaluations)
-        universe = Universe(stream_problem, evaluations,
-                            use_bounds=True, only_eager=False)
+        with statistics.phase('streams'):
+            evaluations = evaluate_eager(problem, evaluations)
+        with statistics.phase('universe'):
+            if universe is None:
+                universe = Universe(stream_problem, evaluations, use_bounds=True,
+                                    only_eager=False, persistent=True)
+            else:
+                universe.update(evaluations)
         if not all(f.eager for f in universe.defined_functions):
             raise NotImplementedError(
                 'Non-eager functions are not yet supported')
 
-        abstract_evals = bound_stream_instances(universe)
-        universe.evaluations -= abstract_evals
+        with statistics.phase('bounds'):
+            abstract_evals = bound_stream_instances(universe)
+            for eval in abstract_evals:
+                universe.remove_eval(eval)
 
         mt = (max_time - (time.time() - start_time))
         if disabled:
             mt = min(max_planner_time, mt)
         combined_plan = solve_universe(universe, planner=planner, max_time=mt,
-                                       max_cost=min(best_cost, max_cost), verbose=verbose_search)
+                                       max_cost=min(best_cost, max_cost), verbose=verbose_search,
+                                       statistics=statistics)
         if combined_plan is None:
             if not disabled:
                 break
-            reset_fn(disabled, evaluations)
+            with statistics.phase('streams'):
+                reset_fn(disabled, evaluations)
             num_epochs += 1
             continue
 
@@ -172,22 +184,27 @@ def plan_focused(problem, max_time=INF, max_cost=INF, terminate_cost=INF, effort
         print 'Actions:', action_plan
         print 'Streams:', stream_plan
         if not stream_plan:
-            cost = get_cost(combined_plan, universe.evaluations)
+            with statistics.phase('validation'):
+                cost = get_cost(combined_plan, universe.evaluations)
             if cost < best_cost:
                 best_plan = combined_plan
                 best_cost = cost
             if (best_cost < terminate_cost) or not disabled:
                 break
-            reset_fn(disabled, evaluations)
+            with statistics.phase('streams'):
+                reset_fn(disabled, evaluations)
             num_epochs += 1
             continue
         negative_atoms = []
-        if bind:
-
-            reattempt = multi_bind_call_streams(
-                evaluations, disabled, stream_plan, negative_atoms)
-        else:
-            reattempt = call_streams(
-                evaluations, disabled, stream_plan, negative_atoms)
-
-    return best_plan, evaluations
+        with statistics.phase('streams'):
+            if bind:
+
+                reattempt = multi_bind_call_streams(
+                    evaluations, disabled, stream_plan, negative_atoms)
+            else:
+                reattempt = call_streams(
+                    evaluations, disabled, stream_plan, negative_atoms, num_workers=num_workers,
+                    max_time=max_time - (time.time() - start_time))
+
+    statistics.update(iterations=num_iterations, epochs=num_epochs, evaluations=len(evaluations))
+    return best_plan, evaluations, statistics
@@ -0,0 +1,194 @@
+import time
+from collections import namedtuple
+from heapq import heappush, heappop
+from itertools import count
+
+from ss.utils import INF
+
+MAX_OPERATORS = 100
+
+Operator = namedtuple('Operator', ['preconditions', 'effects', 'cost', 'original'])
+
+
+def astar(g, h):
+    return (g + h, h)
+
+
+# Only the configurations reproduced exactly (A* with the same heuristic, cost type and f, h tie-breaking).
+# Preferred operators, lazy evaluation, cea and portfolios are only available through Fast Downward.
+PYTHON_PLANNERS = {
+    'dijkstra': ('blind', astar),
+    'max-astar': ('max', astar),
+    'ff-astar': ('ff', astar),
+}
+
+
+class SearchTask(object):
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.index = {var: i for i, var in enumerate(problem.var_order)}
+        self.derived = [self.index[var] for var in problem.derived_vars]
+        self.goal = self.get_facts(problem.goal)
+        self.actions = [Operator(self.get_facts(action.preconditions),
+                                 self.get_facts(sorted(action.effects, key=lambda f: f.val != problem.default)),
+                                 action.cost, action.original) for action in problem.actions]
+        self.axioms = [Operator(self.get_facts(axiom.preconditions), self.get_facts([axiom.effect]), 0, None)
+                       for axiom in problem.axioms]
+        self.initial = self.apply_axioms([problem.initial[var] for var in problem.var_order])
+        self.operators = self.actions + self.axioms
+        self.num_preconditions = [len(set(operator.preconditions)) for operator in self.operators]
+        self.consumers = {}
+        for index, operator in enumerate(self.operators):
+            for fact in set(operator.preconditions):
+                self.consumers.setdefault(fact, []).append(index)
+
+    def get_facts(self, facts):
+        return tuple((self.index[f.var], f.val) for f in facts)
+
+    def holds(self, state, facts):
+        return all(state[i] == val for i, val in facts)
+
+    def apply_axioms(self, values):
+        for i in self.derived:
+            values[i] = self.problem.default
+        changed = True
+        while changed:
+            changed = False
+            for axiom in self.axioms:
+                (i, val), = axiom.effects
+                if (values[i] != val) and self.holds(values, axiom.preconditions):
+                    values[i] = val
+                    changed = True
+        return tuple(values)
+
+    def successors(self, state):
+        for action in self.actions:
+            if self.holds(state, action.preconditions):
+                values = list(state)
+                for i, val in action.effects:
+                    values[i] = val
+                yield action, self.apply_axioms(values)
+
+    def is_goal(self, state):
+        return self.holds(state, self.goal)
+
+    def explore(self, state, combine):
+        # Generalized Dijkstra over the delete relaxation; axioms are free operators
+        costs = {}
+        supporters = {}
+        remaining = list(self.num_preconditions)
+        operator_costs = [0] * len(self.operators)
+        counter = count()
+        queue = [(0, next(counter), (i, val), None) for i, val in enumerate(state)]
+        queue += [(0, next(counter), (i, self.problem.default), None) for i in self.derived]
+        queue += [(operator.cost, next(counter), fact, index) for index, operator in enumerate(self.operators)
+                  if not remaining[index] for fact in operator.effects]
+        queue.sort()
+        goal = set(self.goal)
+        while queue and goal:
+            cost, _, fact, supporter = heappop(queue)
+            if fact in costs:
+                continue
+            costs[fact] = cost
+            supporters[fact] = supporter
+            goal.discard(fact)
+            for index in self.consumers.get(fact, []):
+                remaining[index] -= 1
+                operator_costs[index] = combine(operator_costs[index], cost)
+                if remaining[index] == 0:
+                    operator = self.operators[index]
+                    for effect in operator.effects:
+                        if effect not in costs:
+                            heappush(queue, (operator_costs[index] + operator.cost, next(counter), effect, index))
+        if goal:
+            return None, supporters
+        return costs, supporters
+
+    def h_blind(self, state):
+        return 0 if self.is_goal(state) else min([action.cost for action in self.actions] or [0])
+
+    def h_max(self, state):
+        costs, _ = self.explore(state, max)
+        if costs is None:
+            return INF
+        return max([0] + [costs[fact] for fact in self.goal])
+
+    def h_ff(self, state):
+        costs, supporters = self.explore(state, lambda x, y: x + y)
+        if costs is None:
+            return INF
+        relaxed_plan = set()
+        queue = list(set(self.goal))
+        reached = set(queue)
+        while queue:
+            index = supporters[queue.pop()]
+            if (index is None) or (index in relaxed_plan):
+                continue
+            relaxed_plan.add(index)
+            for fact in self.operators[index].preconditions:
+                if fact not in reached:
+                    reached.add(fact)
+                    queue.append(fact)
+        return sum(self.operators[index].cost for index in relaxed_plan)
+
+    def get_heuristic(self, name):
+        return getattr(self, 'h_{}'.format(name))
+
+
+def best_first_search(task, heuristic, priority, max_time=INF, max_cost=INF, verbose=False):
+    start_time = time.time()
+    h_from_state = {task.initial: heuristic(task.initial)}
+    if h_from_state[task.initial] == INF:
+        return None
+    parents = {task.initial: None}
+    costs = {task.initial: 0}
+    counter = count()
+    queue = [(priority(0, h_from_state[task.initial]), next(counter), 0, task.initial)]
+    expanded = 0
+    while queue and ((time.time() - start_time) < max_time):
+        _, _, cost, state = heappop(queue)
+        if costs[state] < cost:
+            continue
+        if task.is_goal(state):
+            plan = []
+            while parents[state] is not None:
+                state, action = parents[state]
+                plan.append(action.original)
+            if verbose:
+                print 'Expanded: {} | Generated: {} | Cost: {} | Time: {:.3f}'.format(
+                    expanded, len(costs), cost, time.time() - start_time)
+            return plan[::-1]
+        expanded += 1
+        for action, successor in task.successors(state):
+            successor_cost = cost + action.cost
+            if (max_cost <= successor_cost) or (costs.get(successor, INF) <= successor_cost):
+                continue
+            if successor not in h_from_state:
+                h_from_state[successor] = heuristic(successor)
+            h = h_from_state[successor]
+            if h == INF:
+                continue
+            costs[successor] = successor_cost
+            parents[successor] = (state, action)
+            heappush(queue, (priority(successor_cost, h), next(counter), successor_cost, successor))
+    if verbose:
+        print 'Expanded: {} | Generated: {} | Time: {:.3f}'.format(expanded, len(costs), time.time() - start_time)
+    return None
+
+
+def is_small(problem):
+    return (len(problem.actions) + len(problem.axioms)) <= MAX_OPERATORS
+
+
+def has_python_planner(planner):
+    return isinstance(planner, basestring) and (planner in PYTHON_PLANNERS)
+
+
+def python_search(problem, planner='ff-astar', max_time=INF, max_cost=INF, verbose=False, **kwargs):
+    if not has_python_planner(planner):
+        raise ValueError('Unknown planner {}. Options: {}'.format(planner, sorted(PYTHON_PLANNERS)))
+    heuristic, priority = PYTHON_PLANNERS[planner]
+    task = SearchTask(problem)
+    return best_first_search(task, task.get_heuristic(heuristic), priority,
+                             max_time=max_time, max_cost=max_cost, verbose=verbose)
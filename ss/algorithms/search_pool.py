@@ -0,0 +1,161 @@
+import os
+import subprocess
+import threading
+from itertools import count
+from time import time
+
+from ss.utils import INF
+
+KILL_DELAY = 1
+
+
+class SearchProcess(object):
+    _ids = count()
+
+    def __init__(self, command, sas, plan_path, max_time=INF):
+        self.id = next(self._ids)
+        self.command = command
+        self.sas = sas
+        self.plan_path = plan_path
+        self.max_time = max_time
+        self.process = None
+        self.output = None
+        self.returncode = None
+        self.cancelled = False
+        self.timed_out = False
+        self.start_time = None
+        self.runtime = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._listeners = []
+
+    def run(self, slots=None):
+        if slots is not None:
+            slots.acquire()
+        try:
+            self._run()
+        finally:
+            if slots is not None:
+                slots.release()
+            self._finish()
+
+    def _run(self):
+        with self._lock:
+            if self.cancelled:
+                return
+            self.start_time = time()
+            self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE,
+                                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        timer = None
+        if self.max_time != INF:
+            timer = threading.Timer(self.max_time + KILL_DELAY, self._timeout)
+            timer.start()
+        try:
+            if isinstance(self.sas, basestring):
+                self.output, _ = self.process.communicate(self.sas)
+            else:
+                self.output = self._stream(self.sas())
+        finally:
+            if timer is not None:
+                timer.cancel()
+            self.returncode = self.process.returncode
+            self.runtime = time() - self.start_time
+
+    def _stream(self, chunks):
+        output = []
+        reader = threading.Thread(target=lambda: output.append(self.process.stdout.read()))
+        reader.daemon = True
+        reader.start()
+        try:
+            for chunk in chunks:
+                self.process.stdin.write(chunk)
+            self.process.stdin.close()
+        except IOError:
+            pass
+        reader.join()
+        self.process.wait()
+        return ''.join(output)
+
+    def _timeout(self):
+        self.timed_out = True
+        self._kill()
+
+    def _kill(self):
+        if (self.process is not None) and (self.process.poll() is None):
+            try:
+                self.process.kill()
+            except OSError:
+                pass
+
+    def cancel(self):
+        if self.done():
+            return
+        with self._lock:
+            self.cancelled = True
+            self._kill()
+
+    def _finish(self):
+        with self._lock:
+            self._done.set()
+            for event in self._listeners:
+                event.set()
+
+    def add_listener(self, event):
+        with self._lock:
+            self._listeners.append(event)
+            if self.done():
+                event.set()
+
+    def remove_listener(self, event):
+        with self._lock:
+            self._listeners.remove(event)
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        self._done.wait(timeout)
+        return self.done()
+
+    def solved(self):
+        return self.done() and not self.cancelled and os.path.exists(self.plan_path)
+
+    def read_plan(self):
+        if not self.solved():
+            return None
+        with open(self.plan_path, 'r') as f:
+            return f.read()
+
+    def __repr__(self):
+        return '{}({},returncode={})'.format(self.__class__.__name__, self.id, self.returncode)
+
+
+def wait_any(searches, timeout=None):
+    if not searches:
+        return []
+    finished = threading.Event()
+    for search in searches:
+        search.add_listener(finished)
+    try:
+        finished.wait(timeout)
+    finally:
+        for search in searches:
+            search.remove_listener(finished)
+    return [s for s in searches if s.done()]
+
+
+class SearchPool(object):
+
+    def __init__(self, max_workers=1):
+        self.max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    def submit(self, command, sas, plan_path, max_time=INF):
+        search = SearchProcess(command, sas, plan_path, max_time=max_time)
+        thread = threading.Thread(target=search.run, args=(self._slots,))
+        thread.daemon = True
+        thread.start()
+        return search
+
+    def __repr__(self):
+        return '{}(max_workers={})'.format(self.__class__.__name__, self.max_workers)
@@ -6,6 +6,7 @@ from ss.algorithms.incremental import solve_universe
 from ss.algorithms.universe import Universe
 from ss.model.functions import infer_evaluations
 from ss.model.problem import get_length, get_cost
+from ss.model.statistics import Statistics
 from ss.utils import INF
 from ss.algorithms.dual_focused import bound_stream_instances, solve_streams
 
@@ -89,10 +90,12 @@ def sequence_focused(problem, max_time=INF, max_cost=INF, terminate_cost=INF,
                      planner='ff-astar', waves=1, verbose=False):
 
     start_time = time.time()
+    statistics = Statistics(problem)
     num_epochs = 1
     num_iterations = 0
     evaluations = infer_evaluations(problem.initial)
     disabled = deque()
+    universe = None
     best_plan = None
     best_cost = INF
     search_time = 0
@@ -101,25 +104,33 @@ def sequence_focused(problem, max_time=INF, max_cost=INF, terminate_cost=INF,
         num_iterations += 1
         print '\nEpoch: {} | Iteration: {} | Disabled: {} | Cost: {} | '              'Search time: {:.3f} | Stream time: {:.3f} | Total time: {:.3f}'.format(
             num_epochs, num_iterations, len(disabled), best_cost, search_time, stream_time, time.time() - start_time)
-        evaluations = evaluate_eager(problem, evaluations)
-        universe = Universe(problem, evaluations,
-                            use_bounds=True, only_eager=False)
+        with statistics.phase('streams'):
+            evaluations = evaluate_eager(problem, evaluations)
+        with statistics.phase('universe'):
+            if universe is None:
+                universe = Universe(problem, evaluations, use_bounds=True,
+                                    only_eager=False, persistent=True)
+            else:
+                universe.update(evaluations)
         if not all(f.eager for f in universe.defined_functions):
             raise NotImplementedError(
                 'Non-eager functions are not yet supported')
-        bound_streams = bound_stream_instances(universe)
+        with statistics.phase('bounds'):
+            bound_streams = bound_stream_instances(universe)
         t0 = time.time()
 
         plan = solve_universe(universe, planner=planner,
                               max_time=(max_time - (time.time() - start_time)),
-                              max_cost=min(best_cost, max_cost), verbose=verbose)
+                              max_cost=min(best_cost, max_cost), verbose=verbose, statistics=statistics)
         search_time += (time.time() - t0)
-        cost = get_cost(plan, universe.evaluations)
+        with statistics.phase('validation'):
+            cost = get_cost(plan, universe.evaluations)
         print 'Actions | Length: {} | Cost: {} | {}'.format(
             get_length(plan, universe.evaluations), cost, plan)
         t0 = time.time()
-        streams = solve_streams(universe, evaluations,
-                                plan, bound_streams, start_time, max_time)
+        with statistics.phase('stream_planning'):
+            streams, _ = solve_streams(universe, evaluations,
+                                       plan, bound_streams, start_time, max_time, False)
         stream_time += (time.time() - t0)
         print 'Streams | Length: {} | {}'.format(get_length(streams, None), streams)
         if streams:
@@ -132,8 +143,10 @@ def sequence_focused(problem, max_time=INF, max_cost=INF, terminate_cost=INF,
             prune_sequences(disabled, best_cost)
         if (best_cost < terminate_cost) or not disabled:
             break
-        for _ in xrange(waves):
+        with statistics.phase('streams'):
+            for _ in xrange(waves):
 
-            evaluate_sequences(evaluations, disabled, INF)
+                evaluate_sequences(evaluations, disabled, INF)
         num_epochs += 1
-    return best_plan, evaluations
+    statistics.update(iterations=num_iterations, epochs=num_epochs, evaluations=len(evaluations))
+    return best_plan, evaluations, statistics
@@ -1,6 +1,6 @@
 import os
 
-from ss.algorithms.fast_downward import TEMP_DIR, DOMAIN_INPUT, PROBLEM_INPUT, write, read, ensure_dir, safe_remove, safe_rm_dir
+from ss.algorithms.fast_downward import DOMAIN_INPUT, PROBLEM_INPUT, write, temp_workspace
 from ss.utils import INF
 
 ENV_VAR = 'SMTPLAN_PATH'
@@ -21,20 +21,19 @@ def get_smtplan_root():
     return os.environ[ENV_VAR]
 
 
-def smtplan(domain_pddl, problem_pddl, max_length=20, verbose=False, **kwargs):
-    safe_rm_dir(TEMP_DIR)
-    ensure_dir(TEMP_DIR)
-    domain_path = TEMP_DIR + DOMAIN_INPUT
-    problem_path = TEMP_DIR + PROBLEM_INPUT
-    write(domain_path, domain_pddl)
-    write(problem_path, problem_pddl)
+def smtplan(domain_pddl, problem_pddl, max_length=20, verbose=False, clean=True, temp_dir=None, **kwargs):
+    with temp_workspace(temp_dir, clean=clean) as workspace:
+        domain_path = os.path.join(workspace, DOMAIN_INPUT)
+        problem_path = os.path.join(workspace, PROBLEM_INPUT)
+        write(domain_path, domain_pddl)
+        write(problem_path, problem_pddl)
 
-    command = os.path.join(get_smtplan_root(), COMMAND %
-                           (domain_path, problem_path, max_length))
-    if verbose:
-        print command
-    p = os.popen(command)
-    output = p.read()
+        command = os.path.join(get_smtplan_root(), COMMAND %
+                               (domain_path, problem_path, max_length))
+        if verbose:
+            print command
+        p = os.popen(command)
+        output = p.read()
     if verbose:
         print output
 
@@ -47,8 +46,6 @@ def smtplan(domain_pddl, problem_pddl, max_length=20, verbose=False, **kwargs):
             continue
         entries = line[line.find('(') + 1:line.find(')')].split(' ')
         plan.append((entries[0], entries[1:]))
-    if not verbose:
-        remove_dir(TEMP_DIRECTORY)
     return plan
 
 
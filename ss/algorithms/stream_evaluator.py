@@ -0,0 +1,57 @@
+import atexit
+from collections import deque
+from multiprocessing.pool import ThreadPool
+
+STREAM_POOLS = {}
+
+
+def get_stream_pool(num_workers):
+    if num_workers not in STREAM_POOLS:
+        STREAM_POOLS[num_workers] = ThreadPool(num_workers)
+    return STREAM_POOLS[num_workers]
+
+
+def close_stream_pools():
+    for pool in STREAM_POOLS.values():
+        pool.close()
+    STREAM_POOLS.clear()
+
+
+atexit.register(close_stream_pools)
+
+
+class Resolved(object):
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+class StreamEvaluator(object):
+    # Keeps up to num_workers stream calls in flight and returns their results in submission order
+
+    def __init__(self, num_workers=1):
+        self.num_workers = num_workers
+        self.pending = deque()
+
+    def full(self):
+        return self.num_workers <= len(self.pending)
+
+    def submit(self, key, fn, *args):
+        if self.num_workers <= 1:
+            result = Resolved(fn(*args))
+        else:
+            result = get_stream_pool(self.num_workers).apply_async(fn, args)
+        self.pending.append((key, result))
+
+    def next_result(self):
+        key, result = self.pending.popleft()
+        return key, result.get()
+
+    def __len__(self):
+        return len(self.pending)
+
+    def __repr__(self):
+        return '{}(workers={},pending={})'.format(self.__class__.__name__, self.num_workers, len(self.pending))
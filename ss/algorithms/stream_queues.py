@@ -0,0 +1,139 @@
+from collections import deque
+from heapq import heappush, heappop
+from itertools import count
+
+
+def pop_consecutive(queue, max_size):
+    # Pops the next instance along with any immediately following instances of the same stream
+    batch = [queue.popleft()]
+    while queue and (len(batch) < max_size) and (queue.peek().stream is batch[0].stream):
+        batch.append(queue.popleft())
+    return batch
+
+
+class FIFOQueue(deque):
+
+    def peek(self):
+        return self[0]
+
+    def pop_batch(self, max_size=1):
+        return pop_consecutive(self, max_size)
+
+
+class EffortQueue(object):
+
+    def __init__(self, instances=tuple()):
+        self.heap = []
+        self.counter = count()
+        for instance in instances:
+            self.append(instance)
+
+    def priority(self, instance):
+        return (instance.calls + 1) * instance.get_effort()
+
+    def append(self, instance):
+        heappush(self.heap, (self.priority(instance), next(self.counter), instance))
+
+    def peek(self):
+        return self.heap[0][-1]
+
+    def popleft(self):
+        return heappop(self.heap)[-1]
+
+    def pop_batch(self, max_size=1):
+        return pop_consecutive(self, max_size)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __iter__(self):
+        return (instance for _, _, instance in sorted(self.heap))
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, list(self))
+
+
+class RoundRobinQueue(object):
+
+    def __init__(self, instances=tuple()):
+        self.queues = {}
+        self.order = deque()
+        self.size = 0
+        for instance in instances:
+            self.append(instance)
+
+    def append(self, instance):
+        stream = instance.stream
+        if stream not in self.queues:
+            self.queues[stream] = deque()
+        if not self.queues[stream]:
+            self.order.append(stream)
+        self.queues[stream].append(instance)
+        self.size += 1
+
+    def next_stream(self):
+        return self.order[0]
+
+    def peek(self):
+        return self.queues[self.next_stream()][0]
+
+    def pop_batch(self, max_size=1):
+        # A batch of instances from the same stream takes a single turn
+        stream = self.next_stream()
+        self.order.remove(stream)
+        batch = []
+        while self.queues[stream] and (len(batch) < max_size):
+            batch.append(self.queues[stream].popleft())
+        if self.queues[stream]:
+            self.order.append(stream)
+        self.size -= len(batch)
+        return batch
+
+    def popleft(self):
+        return self.pop_batch()[0]
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return (instance for stream in self.order for instance in self.queues[stream])
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, list(self))
+
+
+class FairQueue(RoundRobinQueue):
+
+    def __init__(self, instances=tuple(), weights=None):
+        self.weights = {} if weights is None else weights
+        self.spent = {}
+        super(FairQueue, self).__init__(instances)
+
+    def share(self, stream):
+        return float(self.spent.get(stream, 0)) / self.weights.get(stream.name, 1)
+
+    def next_stream(self):
+        return min(self.order, key=self.share)
+
+    def pop_batch(self, max_size=1):
+        batch = super(FairQueue, self).pop_batch(max_size)
+        for instance in batch:
+            self.spent[instance.stream] = self.spent.get(instance.stream, 0) + \
+                instance.stream.effort_fn(*instance.inputs)
+        return batch
+
+
+STREAM_QUEUES = {
+    'fifo': FIFOQueue,
+    'effort': EffortQueue,
+    'round-robin': RoundRobinQueue,
+    'fair': FairQueue,
+}
+
+
+def get_stream_queue(queue='fifo', instances=tuple()):
+    if callable(queue):
+        return queue(instances)
+    if queue not in STREAM_QUEUES:
+        raise ValueError('Unknown stream queue {}. Options: {}'.format(queue, sorted(STREAM_QUEUES)))
+    return STREAM_QUEUES[queue](instances)
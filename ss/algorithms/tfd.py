@@ -2,7 +2,7 @@
 import os
 import subprocess
 
-from ss.algorithms.fast_downward import TEMP_DIR, DOMAIN_INPUT, PROBLEM_INPUT, write, read, ensure_dir, safe_remove, safe_rm_dir
+from ss.algorithms.fast_downward import DOMAIN_INPUT, PROBLEM_INPUT, write, read, temp_workspace
 from ss.utils import INF
 
 ENV_VAR = 'TFD_PATH'
@@ -56,45 +56,38 @@ def get_tfd_root():
     return os.environ[ENV_VAR]
 
 
-def tfd(domain_pddl, problem_pddl, max_time=INF, max_cost=INF, verbose=True):
-    safe_rm_dir(TEMP_DIR)
-    ensure_dir(TEMP_DIR)
-    domain_path = TEMP_DIR + DOMAIN_INPUT
-    problem_path = TEMP_DIR + PROBLEM_INPUT
-    write(domain_path, domain_pddl)
-    write(problem_path, problem_pddl)
+def tfd(domain_pddl, problem_pddl, max_time=INF, max_cost=INF, verbose=True, clean=True, temp_dir=None):
+    with temp_workspace(temp_dir, clean=clean) as workspace:
+        domain_path = os.path.join(workspace, DOMAIN_INPUT)
+        problem_path = os.path.join(workspace, PROBLEM_INPUT)
+        write(domain_path, domain_pddl)
+        write(problem_path, problem_pddl)
 
-    plan_path = os.path.join(TEMP_DIR, PLAN_FILE)
+        plan_path = os.path.join(workspace, PLAN_FILE)
+        command = os.path.join(get_tfd_root(), COMMAND.format(domain_path, problem_path, plan_path))
+        if verbose:
+            print command
 
-    paths = [os.path.join(os.getcwd(), p)
-             for p in (domain_path, problem_path, plan_path)]
-    command = os.path.join(get_tfd_root(), COMMAND.format(*paths))
-    if verbose:
-        print command
+        stdout = None if verbose else open(os.devnull, 'w')
 
-    stdout = None if verbose else open(os.devnull, 'w')
+        stderr = None
+        try:
+            proc = subprocess.Popen(command.split(
+                ' '), cwd=get_tfd_root(), stdout=stdout, stderr=stderr)
+            proc.wait()
 
-    stderr = None
-    try:
-        proc = subprocess.Popen(command.split(
-            ' '), cwd=get_tfd_root(), stdout=stdout, stderr=stderr)
-        proc.wait()
+        except subprocess.CalledProcessError, e:
+            print "Subprocess error", e.output
+            raw_input("Continue?")
 
-    except subprocess.CalledProcessError, e:
-        print "Subprocess error", e.output
-        raw_input("Continue?")
+        plan_files = sorted([f for f in os.listdir(
+            workspace) if f.startswith(PLAN_FILE)])
+        if verbose:
+            print plan_files
 
-    temp_path = os.path.join(os.getcwd(), TEMP_DIR)
-    plan_files = sorted([f for f in os.listdir(
-        temp_path) if f.startswith(PLAN_FILE)])
-    if verbose:
-        print plan_files
-
-    if not plan_files:
-        return None
-    output = None
-    with open(os.path.join(temp_path, plan_files[-1]), 'r') as f:
-        output = f.read()
+        if not plan_files:
+            return None
+        output = read(os.path.join(workspace, plan_files[-1]))
 
     plan = []
     for line in output.split('\n')[:-1]:
@@ -103,6 +96,4 @@ def tfd(domain_pddl, problem_pddl, max_time=INF, max_cost=INF, verbose=True):
         if args == ['']:
             args = []
         plan.append((action, args))
-    if not verbose:
-        safe_rm_dir(TEMP_DIR)
     return plan
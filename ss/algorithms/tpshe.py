@@ -1,6 +1,7 @@
 from time import time
-from fast_downward import read, write, safe_rm_file, safe_rm_dir, ensure_dir, INF, TEMP_DIR
+from fast_downward import read, write, temp_workspace, INF
 import os
+import subprocess
 import re
 import math
 
@@ -11,7 +12,7 @@ TMP_OUTPUT_PATH = 'tmp_sas_plan'
 
 ENV_VAR = 'TPSHE_PATH'
 
-COMMAND = 'python {}bin/plan.py she {} {} --time {} --iterated'
+PLAN_SCRIPT = 'bin/plan.py'
 
 
 def get_tpshe_root():
@@ -20,27 +21,28 @@ def get_tpshe_root():
     return os.environ[ENV_VAR]
 
 
-def run_tpshe(max_time, verbose):
-    command = COMMAND.format(get_tpshe_root(), TEMP_DIR + DOMAIN_PATH,
-                             TEMP_DIR + PROBLEM_PATH, int(math.ceil(max_time)))
+def run_tpshe(max_time, verbose, workspace):
+    command = ['python', os.path.join(get_tpshe_root(), PLAN_SCRIPT), 'she',
+               os.path.join(workspace, DOMAIN_PATH), os.path.join(workspace, PROBLEM_PATH),
+               '--time', str(int(math.ceil(max_time))), '--iterated']
     t0 = time()
-    p = os.popen(command)
     if verbose:
-        print command
-    output = p.read()
+        print ' '.join(command)
+    p = subprocess.Popen(command, cwd=workspace, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output, _ = p.communicate()
     if verbose:
         print
         print output
         print 'Runtime:', time() - t0
 
     plan_files = sorted(f for f in os.listdir(
-        '.') if f.startswith(TMP_OUTPUT_PATH))
+        workspace) if f.startswith(TMP_OUTPUT_PATH))
     if not plan_files:
         return None
 
     best_plan, best_makespan = None, INF
     for plan_file in plan_files:
-        plan, duration = parse_tmp_solution(read(plan_file))
+        plan, duration = parse_tmp_solution(read(os.path.join(workspace, plan_file)))
         print plan_file, len(plan), duration
         if duration <= best_makespan:
             best_plan, best_makespan = plan, duration
@@ -69,24 +71,8 @@ def parse_tmp_solution(solution):
         plan.append((entries[0], tuple(entries[1:])))
     return plan, total_duration
 
-PATHS = [OUTPUT_PATH, TMP_OUTPUT_PATH,
-         'dom.pddl', 'ins.pddl', 'output', 'output.sas',
-         'plan.validation', 'tdom.pddl', 'tins.pddl']
-
-
-def remove_paths():
-    safe_rm_dir(TEMP_DIR)
-    for f in os.listdir('.'):
-        if any(f.startswith(p) for p in PATHS):
-            safe_rm_file(f)
-
-
-def tpshe(domain_pddl, problem_pddl, max_time=30, verbose=True, clean=False, **kwargs):
-    remove_paths()
-    ensure_dir(TEMP_DIR)
-    write(TEMP_DIR + DOMAIN_PATH, domain_pddl)
-    write(TEMP_DIR + PROBLEM_PATH, problem_pddl)
-    solution = run_tpshe(max_time, verbose)
-    if clean:
-        remove_paths()
-    return solution
+def tpshe(domain_pddl, problem_pddl, max_time=30, verbose=True, clean=True, temp_dir=None, **kwargs):
+    with temp_workspace(temp_dir, clean=clean) as workspace:
+        write(os.path.join(workspace, DOMAIN_PATH), domain_pddl)
+        write(os.path.join(workspace, PROBLEM_PATH), problem_pddl)
+        return run_tpshe(max_time, verbose, workspace)
@@ -1,11 +1,16 @@
-from collections import defaultdict, deque
-from itertools import product
+from collections import defaultdict
 
 from ss.model.functions import Object, Function, Predicate, initialize, process_domain, Atom, Predicate, NegatedAtom
-from ss.model.problem import reset_derived, apply_axioms, dump_evaluations
-from ss.model.operators import applicable, apply, Goal
-from ss.model.streams import Stream
-from ss.to_pddl import pddl_domain, pddl_problem
+from ss.model.problem import dump_evaluations
+from ss.model.simulator import StateSimulator
+from ss.model.streams import Stream, BatchStream
+from ss.algorithms.stream_queues import get_stream_queue
+from ss.utils import INF, LRUCache
+from ss.to_pddl import pddl_domain, format_problem
+
+
+EMPTY = frozenset()
+GROUND_CACHE_SIZE = 10 ** 5
 
 
 def get_mapping(atoms1, atoms2, initial={}):
@@ -25,15 +30,21 @@ class Universe(object):
     _domain_name = 'stripstream'
     _problem_name = _domain_name
 
-    def __init__(self, problem, initial, use_bounds, only_eager, evaluate=True):
+    def __init__(self, problem, initial, use_bounds, only_eager, evaluate=True, persistent=False, queue='fifo'):
 
         self.problem = problem
         self.use_bounds = use_bounds
         self.only_eager = only_eager
         self.evaluate = evaluate
+        self.persistent = persistent
+        self.queue = queue
+        self.trail = None
+        self.persistent_instances = []
+        self.bound_heads = []
         self.evaluations = set()
         self.value_from_head = {}
         self.atoms_from_predicate = defaultdict(set)
+        self.atoms_from_arg = defaultdict(set)
         self.fluents = self.problem.fluents()
         self.computed = set()
 
@@ -47,14 +58,24 @@ class Universe(object):
         for axiom in problem.axioms:
             self.axioms_from_derived[axiom.effect.head.function].append(axiom)
 
-        self.functions = set()
-        for action in (problem.actions + problem.axioms):
-            self.functions.update(action.functions())
-        for literal in problem.goal:
-            self.functions.add(literal.head.function)
+        self.functions = problem.functions()
+
+        self.static_from_operator = {}
+        self.operators_from_predicate = defaultdict(list)
+        for operator in problem.actions + problem.axioms:
+            static_atoms = process_domain({a for a in operator.preconditions if isinstance(a, Atom) and self.is_static(a)}
+                                          | {Object(p) for p in operator.parameters})
+            self.static_from_operator[operator] = static_atoms
+            for i, atom in enumerate(static_atoms):
+                self.operators_from_predicate[atom.head.function].append((operator, i))
+        self.instances_from_operator = {}
+        self.ground_from_instance = LRUCache(max_size=GROUND_CACHE_SIZE)
+        self.init_evaluations = []
+        self.init_pddl = []
+        self.domain_pddl = None
 
         self.streams_from_predicate = defaultdict(list)
-        self.stream_queue = deque()
+        self.stream_queue = get_stream_queue(queue)
         self.stream_instances = set()
         for stream in problem.streams:
             if only_eager and not stream.eager:
@@ -89,6 +110,42 @@ class Universe(object):
                 continue
             if not stream.domain:
                 self._add_instance(stream, {})
+        if persistent:
+            self.checkpoint()
+
+    def _record(self, undo, *args):
+        if self.trail is not None:
+            self.trail.append((undo, args))
+
+    def checkpoint(self):
+        assert self.trail is None
+        self.trail = []
+        self.persistent_instances = [i for i in self.persistent_instances if not i.enumerated]
+        self.stream_queue = get_stream_queue(self.queue, self.persistent_instances)
+        for head in self.bound_heads:
+            if not head.computed():
+                self.add_eval(head.get_bound())
+
+    def rollback(self):
+        if self.trail is None:
+            return
+        for undo, args in reversed(self.trail):
+            undo(*args)
+        self.trail = None
+        self.stream_queue = get_stream_queue(self.queue)
+
+    def next_batch(self, max_size=INF):
+        stream = self.stream_queue.peek().stream
+        batch_size = stream.batch_size if isinstance(stream, BatchStream) else 1
+        return self.stream_queue.pop_batch(min(batch_size, max_size))
+
+    def update(self, evaluations):
+        assert self.persistent
+        self.rollback()
+        # After a rollback only the evaluations added before the checkpoint remain
+        for eval in set(evaluations).difference(self.evaluations):
+            self.add_eval(eval)
+        self.checkpoint()
 
     def _add_object(self, obj):
         if obj in self.name_from_object:
@@ -98,6 +155,8 @@ class Universe(object):
         self.name_from_object[obj] = name
         assert name not in self.object_from_name
         self.object_from_name[name] = obj
+        self._record(self.name_from_object.pop, obj)
+        self._record(self.object_from_name.pop, name)
 
     def _add_instance(self, relation, mapping):
         inputs = tuple(mapping[p] for p in relation.inputs)
@@ -106,29 +165,62 @@ class Universe(object):
             if not instance.enumerated and (instance not in self.stream_instances):
                 self.stream_instances.add(instance)
                 self.stream_queue.append(instance)
+                if self.persistent and (self.trail is None):
+                    self.persistent_instances.append(instance)
+                self._record(self.stream_instances.discard, instance)
         elif isinstance(relation, Function):
 
             head = relation.get_head(inputs)
             if not head.computed() and (head not in self.computed):
-                if self.use_bounds:
+                if self.use_bounds and self.persistent and (self.trail is None):
+                    self.bound_heads.append(head)
+                elif self.use_bounds:
                     self.add_eval(head.get_bound())
                 else:
                     self.add_eval(head.get_eval())
         else:
             raise ValueError(relation)
 
+    def _candidate_atoms(self, atom, mapping):
+        function = atom.head.function
+        candidates = self.atoms_from_predicate.get(function, EMPTY)
+        for i, p in enumerate(atom.head.args):
+            if p not in mapping:
+                continue
+            atoms = self.atoms_from_arg.get((function, i, mapping[p]), EMPTY)
+            if len(atoms) < len(candidates):
+                candidates = atoms
+            if not candidates:
+                break
+        return candidates
+
+    def _join(self, atoms, mapping):
+        if not atoms:
+            yield mapping
+            return
+
+        index, candidates = min(((i, self._candidate_atoms(a, mapping)) for i, a in enumerate(atoms)),
+                                key=lambda pair: len(pair[1]))
+        remaining = atoms[:index] + atoms[index + 1:]
+        for candidate in candidates:
+            new_mapping = get_mapping([atoms[index]], [candidate], initial=mapping)
+            if new_mapping is not None:
+                for result in self._join(remaining, new_mapping):
+                    yield result
+
+    def mappings(self, atoms, initial={}):
+        return list(self._join(tuple(atoms), initial))
+
     def _update_stream_instances(self, atom):
         if not self.evaluate:
             return
         for relation, i in self.streams_from_predicate[atom.head.function]:
-
-            values = [self.atoms_from_predicate.get(a.head.function, {}) if i != j else {atom}
-                      for j, a in enumerate(relation.domain)]
-            for combo in product(*values):
-
-                mapping = get_mapping(relation.domain, combo)
-                if mapping is not None:
-                    self._add_instance(relation, mapping)
+            domain = relation.domain
+            initial = get_mapping([domain[i]], [atom])
+            if initial is None:
+                continue
+            for mapping in self.mappings(domain[:i] + domain[i + 1:], initial=initial):
+                self._add_instance(relation, mapping)
 
     def is_fluent(self, e):
 
@@ -141,16 +233,37 @@ class Universe(object):
         return not self.is_derived(e) and not self.is_fluent(e)
 
     def _operator_instances(self, operator):
-
-        static_atoms = process_domain({a for a in operator.preconditions if isinstance(a, Atom) and self.is_static(a)}
-                                      | {Object(p) for p in operator.parameters})
-        values = [self.atoms_from_predicate.get(
-            a.head.function, {}) for a in static_atoms]
-        for combo in product(*values):
-
-            mapping = get_mapping(static_atoms, combo)
-            if mapping is not None:
-                yield operator, tuple(mapping[p] for p in operator.parameters)
+        if operator not in self.instances_from_operator:
+            instances = [(operator, tuple(mapping[p] for p in operator.parameters))
+                         for mapping in self.mappings(self.static_from_operator[operator])]
+            self.instances_from_operator[operator] = (instances, set(instances))
+            self._record(self.instances_from_operator.pop, operator)
+        return self.instances_from_operator[operator][0]
+
+    def _update_operator_instances(self, atom):
+        for operator, i in self.operators_from_predicate[atom.head.function]:
+            if operator not in self.instances_from_operator:
+                continue
+            instances, instance_set = self.instances_from_operator[operator]
+            static_atoms = self.static_from_operator[operator]
+            initial = get_mapping([static_atoms[i]], [atom])
+            if initial is None:
+                continue
+            for mapping in self.mappings(static_atoms[:i] + static_atoms[i + 1:], initial=initial):
+                instance = (operator, tuple(mapping[p] for p in operator.parameters))
+                if instance not in instance_set:
+                    instances.append(instance)
+                    instance_set.add(instance)
+                    self._record(instances.pop)
+                    self._record(instance_set.discard, instance)
+
+    def ground(self, operator, args):
+        instance = (operator, args)
+        ground = self.ground_from_instance.get(instance)
+        if ground is None:
+            ground = operator.instantiate(args)
+            self.ground_from_instance[instance] = ground
+        return ground
 
     def action_instances(self):
         for action in self.action_from_name.values():
@@ -163,42 +276,70 @@ class Universe(object):
                 for instance in self._operator_instances(axiom):
                     yield instance
 
+    def ground_axioms(self):
+        return [self.ground(axiom, args) for axiom, args in self.axiom_instances()]
+
     def add_eval(self, eval):
         if eval in self.evaluations:
             return
         if self.value_from_head.get(eval.head, eval.value) != eval.value:
             raise ValueError('{}: {} != {}'.format(
                 eval.head, self.value_from_head[eval.head], eval.value))
-        self.value_from_head[eval.head] = eval.value
-        self.functions.add(eval.head.function)
+        if eval.head not in self.value_from_head:
+            self.value_from_head[eval.head] = eval.value
+            self._record(self.value_from_head.pop, eval.head)
+        if eval.head.function not in self.functions:
+            self.functions.add(eval.head.function)
+            self._record(self.functions.discard, eval.head.function)
         self.evaluations.add(eval)
+        self._record(self.evaluations.discard, eval)
         for obj in eval.head.args:
             self._add_object(obj)
+        if not isinstance(eval, NegatedAtom):
+            self.init_evaluations.append(eval)
+            self._record(self.init_evaluations.pop)
         if isinstance(eval, Atom) and (eval not in self.atoms_from_predicate[eval.head.function]):
             self.atoms_from_predicate[eval.head.function].add(eval)
+            self._record(self.atoms_from_predicate[eval.head.function].discard, eval)
+            for i, arg in enumerate(eval.head.args):
+                self.atoms_from_arg[eval.head.function, i, arg].add(eval)
+                self._record(self.atoms_from_arg[eval.head.function, i, arg].discard, eval)
             self._update_stream_instances(eval)
+            self._update_operator_instances(eval)
         for implied in eval.head.implied():
             self.add_eval(implied)
 
-    def pddl(self):
-        predicates = set(
-            filter(lambda f: isinstance(f, Predicate), self.functions))
-        functions = self.functions - predicates
+    def remove_eval(self, eval):
+        if eval not in self.evaluations:
+            return
+        self.evaluations.discard(eval)
+        self._record(self.evaluations.add, eval)
+
+    def _domain_pddl(self):
+        functions = frozenset(self.functions)
+        if (self.domain_pddl is None) or (self.domain_pddl[0] != functions):
+            predicates = set(filter(lambda f: isinstance(f, Predicate), functions))
+            actions = [a.substitute_constants(self.name_from_object) for a in self.action_from_name.values()]
+            axioms = [a.substitute_constants(self.name_from_object)
+                      for axioms in self.axioms_from_derived.values() for a in axioms]
+            constants = {c for op in (actions + axioms) for c in op.constants()}
+            self.domain_pddl = (functions, constants, pddl_domain(self._domain_name, constants, predicates,
+                                                                  functions - predicates, actions, axioms))
+        return self.domain_pddl[1:]
 
-        initial_str = [e.substitute(self.name_from_object)
-                       for e in self.evaluations if not isinstance(e, NegatedAtom)]
+    def pddl(self):
+        constants, domain_pddl = self._domain_pddl()
+        for eval in self.init_evaluations[len(self.init_pddl):]:
+            self.init_pddl.append(eval.substitute(self.name_from_object).pddl())
+            self._record(self.init_pddl.pop)
+        objects = sorted(name for name in self.object_from_name if name not in constants)
+        # Evaluations retracted with remove_eval keep their cached line but are left out
+        init_str = '\n\t\t'.join(init for eval, init in zip(self.init_evaluations, self.init_pddl)
+                                  if eval in self.evaluations)
         goal_str = [l.substitute(self.name_from_object)
                     for l in self.problem.goal]
-        return pddl_domain(self._domain_name,
-                           self.object_from_name.keys(),
-                           predicates, functions,
-                           [a.substitute_constants(self.name_from_object)
-                            for a in self.action_from_name.values()],
-                           [a.substitute_constants(self.name_from_object)
-                            for axioms in self.axioms_from_derived.values() for a in axioms]),               pddl_problem(self._domain_name, self._problem_name,
-                                                                                                                          [],
-                                                                                                                          initial_str, goal_str,
-                                                                                                                          self.problem.objective)
+        return domain_pddl, format_problem(self._domain_name, self._problem_name, objects,
+                                           init_str, goal_str, self.problem.objective)
 
     def state_fluents(self, state):
         return frozenset(filter(lambda e: not self.is_static(e),
@@ -208,33 +349,24 @@ class Universe(object):
         plan_instances = [self.action_from_name[
             name].instantiate(args) for name, args in plan]
         print plan_instances
-        axioms = [axiom.instantiate(args)
-                  for axiom, args in self.axiom_instances()]
-        state = apply(self.evaluations, defaultdict(bool))
-        reset_derived(self.axioms_from_derived, state)
-        print 0, self.state_fluents(state)
+        simulator = StateSimulator(self.evaluations, self.ground_axioms())
+        state_fluents = lambda: frozenset(e for e in self.state_fluents(simulator.state)
+                                          if not (isinstance(e, NegatedAtom) or self.is_derived(e)))
+        print 0, state_fluents()
         for i, instance in enumerate(plan_instances):
-            apply_axioms(axioms, state)
-            assert instance.applicable(state)
-            state = instance.apply(state)
-            reset_derived(self.axioms_from_derived, state)
-            print i + 1, self.state_fluents(state)
-        apply_axioms(axioms, state)
-        assert applicable(self.problem.goal, state)
+            assert simulator.applicable(instance)
+            simulator.apply(instance)
+            print i + 1, state_fluents()
+        assert simulator.holds(self.problem.goal)
 
     def is_solution(self, plan):
-        plan_instances = [action.instantiate(
-            args) for action, args in plan] + [Goal(self.problem.goal)]
-        axiom_instances = [axiom.instantiate(
-            args) for axiom, args in self.axiom_instances()]
-        state = apply(self.evaluations, defaultdict(bool))
-        for instance in plan_instances:
-            reset_derived(self.axioms_from_derived, state)
-            apply_axioms(axiom_instances, state)
-            if not instance.applicable(state):
+        simulator = StateSimulator(self.evaluations, self.ground_axioms())
+        for action, args in plan:
+            instance = action.instantiate(args)
+            if not simulator.applicable(instance):
                 return False
-            state = instance.apply(state)
-        return True
+            simulator.apply(instance)
+        return simulator.holds(self.problem.goal)
 
     def convert_plan(self, plan):
         if plan is None:
@@ -0,0 +1,92 @@
+import atexit
+import json
+import os
+from contextlib import contextmanager
+from math import log
+from threading import Lock
+
+EFFORT_MODEL = None
+FIELDS = ['calls', 'successes', 'total_time']
+PRIOR_CALLS = 10
+
+
+class EffortModel(object):
+    # Blends each stream's static effort with -log(p) + time_weight*time learned from its RelationStatistics
+
+    def __init__(self, path=None, time_weight=1., prior_calls=PRIOR_CALLS):
+        self.path = path
+        self.time_weight = time_weight
+        self.prior_calls = prior_calls
+        self.totals = {}
+        self.snapshots = {}
+        self._lock = Lock()
+        if (path is not None) and os.path.exists(path):
+            with open(path, 'r') as f:
+                self.totals = {str(name): [observed.get(field, 0) for field in FIELDS]
+                               for name, observed in json.load(f).items()}
+
+    def _update(self, stream):
+        # Running totals per name (or per stream when unnamed) are advanced by the change since the last update
+        key = stream.name or stream
+        current = [getattr(stream.statistics, field) for field in FIELDS]
+        with self._lock:
+            last = self.snapshots.get(stream, [0] * len(FIELDS))
+            if current != last:
+                totals = self.totals.get(key, [0] * len(FIELDS))
+                self.totals[key] = [t + c - l for t, c, l in zip(totals, current, last)]
+                self.snapshots[stream] = current
+            return self.totals.get(key, [0] * len(FIELDS))
+
+    def get_effort(self, stream):
+        calls, successes, total_time = self._update(stream)
+        if not calls:
+            return stream.effort
+        p = float(successes + 1) / (calls + 2)
+        learned = -log(p) + self.time_weight * total_time / calls
+        return (self.prior_calls * stream.effort + calls * learned) / (self.prior_calls + calls)
+
+    def save(self):
+        if self.path is None:
+            return
+        for stream in list(self.snapshots):
+            self._update(stream)
+        with self._lock:
+            data = {key: dict(zip(FIELDS, totals)) for key, totals in self.totals.items()
+                    if isinstance(key, str)}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(self.path, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+
+    def __repr__(self):
+        return '{}({},streams={})'.format(self.__class__.__name__, self.path, len(self.snapshots))
+
+
+def get_effort_model():
+    return EFFORT_MODEL
+
+
+def set_effort_model(model):
+    global EFFORT_MODEL
+    EFFORT_MODEL = model
+
+
+def save_effort_model():
+    if EFFORT_MODEL is not None:
+        EFFORT_MODEL.save()
+
+
+atexit.register(save_effort_model)
+
+
+@contextmanager
+def learned_effort(path=None, **kwargs):
+    model = EffortModel(path, **kwargs)
+    previous = get_effort_model()
+    set_effort_model(model)
+    try:
+        yield model
+    finally:
+        set_effort_model(previous)
+        model.save()
@@ -1,9 +1,14 @@
+import time
+
+from ss.model.result_cache import get_result_cache
+from ss.model.statistics import RelationStatistics
 from ss.to_pddl import pddl_head, pddl_parameter
-from ss.utils import Hashable, INT_INF
+from ss.utils import InternedHashable, LRUCache, INT_INF
 
 OBJECT_NAME = 'Object'
 COST_NAME = 'total-cost'
 TIME_NAME = 'total-time'
+IMPLIED_CACHE = LRUCache(max_size=10 ** 5)
 
 
 def is_parameter(name):
@@ -38,7 +43,12 @@ def process_domain(domain):
     return tuple(set(domain) - implied_atoms(domain))
 
 
-class Head(Hashable):
+class Head(InternedHashable):
+    __slots__ = ('function', 'args')
+
+    @classmethod
+    def _key(cls, func, args):
+        return func, tuple(args)
 
     def __init__(self, func, args):
         self.function = func
@@ -68,11 +78,14 @@ class Head(Hashable):
         return self.function.get_bound(self.args)
 
     def implied(self):
-
-        implied = set()
-        for atom in self.domain():
-            if atom not in implied:
-                implied |= {atom} | atom.head.implied()
+        implied = IMPLIED_CACHE.get(self)
+        if implied is None:
+            implied = set()
+            for atom in self.domain():
+                if atom not in implied:
+                    implied |= {atom} | atom.head.implied()
+            implied = frozenset(implied)
+            IMPLIED_CACHE[self] = implied
         return implied
 
     def mapping(self):
@@ -88,7 +101,8 @@ class Head(Hashable):
         return '{}({})'.format(self.function.name, ','.join(map(repr, self.args)))
 
 
-class Evaluation(Hashable):
+class Evaluation(InternedHashable):
+    __slots__ = ('head', 'value')
 
     def __init__(self, head, value):
         super(Evaluation, self).__init__(head, value)
@@ -115,6 +129,7 @@ class Evaluation(Hashable):
 
 
 class Literal(Evaluation):
+    __slots__ = ()
 
     def __init__(self, head):
         assert isinstance(head.function, Predicate)
@@ -125,6 +140,7 @@ class Literal(Evaluation):
 
 
 class Atom(Literal):
+    __slots__ = ()
     negated = False
 
     def __invert__(self):
@@ -138,6 +154,7 @@ class Atom(Literal):
 
 
 class NegatedAtom(Literal):
+    __slots__ = ()
     negated = True
 
     def __invert__(self):
@@ -172,6 +189,7 @@ class Function(object):
             name = '{}{}'.format(self._prefix, self.n)
         self.name = name
         self.evaluations = {}
+        self.statistics = RelationStatistics()
 
     def bound_fn(self, *args):
         if callable(self.bound):
@@ -181,10 +199,25 @@ class Function(object):
     def computed(self, args):
         return tuple(args) in self.evaluations
 
+    def is_cacheable(self):
+        # Generated names depend on construction order, so only explicitly named functions are cached
+        return self.name != '{}{}'.format(self._prefix, self.n)
+
     def get_eval(self, args):
-        assert (self.fn is not None) and not self.computed(args)
-        self.evaluations[args] = self.fn(*args)
-        return initialize(self.get_head(args), self.evaluations[args])
+        assert (self.fn is not None) and (tuple(args) not in self.evaluations)
+        cache = get_result_cache() if self.is_cacheable() else None
+        result = None if cache is None else cache.get(self.name, tuple(args))
+        if result is not None:
+            value, = result
+            self.statistics.record_hit()
+        else:
+            start_time = time.time()
+            value = self.fn(*args)
+            self.statistics.record(time.time() - start_time, int((value is not None) and (value is not False)))
+            if cache is not None:
+                cache.put(self.name, tuple(args), (value,))
+        self.evaluations[args] = value
+        return initialize(self.get_head(args), value)
 
     def get_bound(self, args):
         assert (self.bound_fn is not None) and not self.computed(args)
@@ -1,4 +1,4 @@
-from ss.model.functions import process_parameters, is_parameter, Atom, Head
+from ss.model.functions import process_parameters, is_parameter, Atom, NegatedAtom, Head
 from ss.to_pddl import pddl_parameter, pddl_conjunction, pddl_at_start, pddl_at_end, pddl_over_all
 
 
@@ -9,9 +9,14 @@ def applicable(preconditions, state):
     return True
 
 
+def ordered_effects(effects):
+    # Deletes are applied first so that an atom that is both added and deleted ends up true, as in PDDL
+    return sorted(effects, key=lambda e: not isinstance(e, NegatedAtom))
+
+
 def apply(effects, state):
     new_state = state.copy()
-    for e in effects:
+    for e in ordered_effects(effects):
         e.assign(new_state)
     return new_state
 
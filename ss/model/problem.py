@@ -2,7 +2,8 @@ from collections import defaultdict, deque
 
 from functions import Atom, initialize
 from ss.model.functions import TotalCost, Predicate
-from ss.model.operators import apply, Initial, Goal, DurativeAction
+from ss.model.operators import apply, Goal, DurativeAction
+from ss.model.simulator import StateSimulator, AxiomEvaluator
 from ss.utils import INF
 
 
@@ -23,15 +24,12 @@ def state_sequence(initial, actions, default=None):
 
 
 def is_solution(evals, plan, goal):
-
-    state = defaultdict(bool)
-    instances = [Initial(evals)] + [action.instantiate(args)
-                                    for action, args in plan] + [Goal(goal)]
-    for instance in instances:
-        if not instance.applicable(state):
+    simulator = StateSimulator(evals)
+    for instance in [action.instantiate(args) for action, args in plan]:
+        if not simulator.applicable(instance):
             return False
-        state = instance.apply(state)
-    return True
+        simulator.apply(instance)
+    return simulator.holds(goal)
 
 
 def instantiate_plan(plan):
@@ -171,14 +169,15 @@ def supporting_axioms(state, goals, axiom_instances):
 
 
 def plan_supporting_axioms(evaluations, plan_instances, axiom_instances, goal):
-    states = state_sequence(evaluations, plan_instances, default=bool)
-    for state, action in zip(states, plan_instances + [Goal(goal)]):
-        yield supporting_axioms(state, action.preconditions, axiom_instances)
+    simulator = StateSimulator(evaluations, axiom_instances)
+    for action in plan_instances:
+        yield simulator.supporting_axioms(action.preconditions)
+        simulator.apply(action)
+    yield simulator.supporting_axioms(goal)
 
 
 def apply_axioms(axiom_instances, state):
-    for eval in axiom_achievers(axiom_instances, state):
-        eval.assign(state)
+    AxiomEvaluator(state, axiom_instances)
 
 
 def get_length(plan, evaluations):
@@ -190,8 +189,10 @@ def get_length(plan, evaluations):
 def get_cost(plan, evaluations):
     if plan is None:
         return INF
-    plan_instances = [action.instantiate(args) for action, args in plan]
-    return state_sequence(evaluations, plan_instances)[-1][TotalCost()]
+    simulator = StateSimulator(evaluations, default=None)
+    for action, args in plan:
+        simulator.apply(action.instantiate(args))
+    return simulator.state[TotalCost()]
 
 
 def dump_evaluations(evaluations):
@@ -0,0 +1,142 @@
+import atexit
+import cPickle as pickle
+import os
+import sqlite3
+from contextlib import contextmanager
+from threading import Lock
+
+RESULT_CACHE = None
+MAX_SIZE = 10 ** 5
+COMMIT_PERIOD = 100
+EVICT_FRACTION = 0.1
+
+
+class ResultCache(object):
+    # Persistent LRU cache of deterministic stream and function results keyed on (name, inputs)
+
+    def __init__(self, path, max_size=MAX_SIZE, commit_period=COMMIT_PERIOD):
+        self.path = path
+        self.max_size = max_size
+        self.commit_period = commit_period
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        self._lock = Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS results '
+                                 '(key BLOB PRIMARY KEY, value BLOB, access INTEGER)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS results_access ON results (access)')
+        self.size, clock = self._connection.execute('SELECT COUNT(*), MAX(access) FROM results').fetchone()
+        self._clock = clock or 0
+
+    def _key(self, name, inputs):
+        try:
+            return sqlite3.Binary(pickle.dumps((name, inputs), pickle.HIGHEST_PROTOCOL))
+        except (pickle.PicklingError, TypeError):
+            return None
+
+    def _tick(self):
+        self._clock += 1
+        self._pending += 1
+        if self.commit_period <= self._pending:
+            self._connection.commit()
+            self._pending = 0
+        return self._clock
+
+    def get(self, name, inputs, default=None):
+        key = self._key(name, inputs)
+        if key is None:
+            return default
+        with self._lock:
+            if self._connection is None:
+                return default
+            row = self._connection.execute('SELECT value FROM results WHERE key=?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._connection.execute('UPDATE results SET access=? WHERE key=?', (self._tick(), key))
+        return pickle.loads(str(row[0]))
+
+    def put(self, name, inputs, value):
+        key = self._key(name, inputs)
+        if key is None:
+            return
+        try:
+            value = sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        except (pickle.PicklingError, TypeError):
+            return
+        with self._lock:
+            if self._connection is None:
+                return
+            access = self._tick()
+            if self._connection.execute('INSERT OR IGNORE INTO results VALUES (?, ?, ?)',
+                                        (key, value, access)).rowcount:
+                self.size += 1
+            else:
+                self._connection.execute('UPDATE results SET value=?, access=? WHERE key=?', (value, access, key))
+            if (self.max_size is not None) and (self.max_size < self.size):
+                self._evict(self.size - int((1 - EVICT_FRACTION) * self.max_size))
+
+    def _evict(self, num):
+        self._connection.execute('DELETE FROM results WHERE key IN '
+                                 '(SELECT key FROM results ORDER BY access LIMIT ?)', (num,))
+        self.size -= num
+
+    def __len__(self):
+        return self.size
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute('DELETE FROM results')
+            self._connection.commit()
+            self.size = 0
+
+    def commit(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.commit()
+                self._pending = 0
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.commit()
+                self._connection.close()
+                self._connection = None
+
+    def __repr__(self):
+        return '{}({},size={},hits={},misses={})'.format(
+            self.__class__.__name__, self.path, self.size, self.hits, self.misses)
+
+
+def get_result_cache():
+    return RESULT_CACHE
+
+
+def set_result_cache(cache):
+    global RESULT_CACHE
+    RESULT_CACHE = cache
+
+
+def close_result_cache():
+    if RESULT_CACHE is not None:
+        RESULT_CACHE.close()
+
+
+atexit.register(close_result_cache)
+
+
+@contextmanager
+def result_cache(path, **kwargs):
+    cache = ResultCache(path, **kwargs)
+    previous = get_result_cache()
+    set_result_cache(cache)
+    try:
+        yield cache
+    finally:
+        set_result_cache(previous)
+        cache.close()
@@ -0,0 +1,181 @@
+from collections import defaultdict, deque
+
+from ss.model.functions import Atom
+from ss.model.operators import apply, applicable, ordered_effects
+
+
+class AxiomEvaluator(object):
+    # Maintains the derived atoms of a state in place using per-axiom counts of unsatisfied preconditions
+
+    def __init__(self, state, axiom_instances):
+        self.state = state
+        self.history = []
+        self.axioms = []
+        self.axioms_from_pre = defaultdict(list)
+        self.axioms_from_eff = defaultdict(list)
+        self.unsatisfied = {}
+        self.achiever = {}
+        for axiom in axiom_instances:
+            if axiom in self.unsatisfied:
+                continue
+            self.axioms.append(axiom)
+            self.unsatisfied[axiom] = 0
+            self.axioms_from_eff[axiom.effect.head].append(axiom)
+        for head in self.axioms_from_eff:
+            self.state.pop(head, None)
+        for axiom in self.axioms:
+            for head in {p.head for p in axiom.preconditions}:
+                self.axioms_from_pre[head].append(axiom)
+                self.unsatisfied[axiom] += not self._true(head)
+        self._frame = ([], [], [])
+        self._derive(a for a in self.axioms if not self.unsatisfied[a])
+        self._frame = None
+
+    def _true(self, head):
+        return self.state.get(head) == True
+
+    def _flip(self, head, was_true, is_true):
+        if was_true == is_true:
+            return []
+        delta = -1 if is_true else +1
+        changed = []
+        for axiom in self.axioms_from_pre.get(head, []):
+            self.unsatisfied[axiom] += delta
+            if self.unsatisfied[axiom] == (0 if is_true else 1):
+                changed.append(axiom)
+        return changed
+
+    def _support(self, head, axiom):
+        self._frame[2].append((head, self.achiever.get(head)))
+        if axiom is None:
+            del self.achiever[head]
+        else:
+            self.achiever[head] = axiom
+
+    def _set(self, head, value):
+        was_true = self._true(head)
+        self._frame[1].append((head, head in self.state, self.state.get(head)))
+        self.state[head] = value
+        return self._flip(head, was_true, self._true(head))
+
+    def _derive(self, axioms):
+        queue = deque(axioms)
+        while queue:
+            axiom = queue.popleft()
+            head = axiom.effect.head
+            if self.unsatisfied[axiom] or self._true(head):
+                continue
+            self._support(head, axiom)
+            queue.extend(self._set(head, True))
+
+    def update(self, was_true):
+        self._frame = ([], [], [])
+        self.history.append(self._frame)
+        unsatisfied, satisfied = [], []
+        for head in was_true:
+            is_true = self._true(head)
+            self._frame[0].append((head, was_true[head], is_true))
+            for axiom in self._flip(head, was_true[head], is_true):
+                (unsatisfied if self.unsatisfied[axiom] else satisfied).append(axiom)
+        # Remove atoms whose achiever lost support, then rederive them through any remaining axiom
+        queue = deque(unsatisfied)
+        removed = []
+        while queue:
+            axiom = queue.popleft()
+            head = axiom.effect.head
+            if self.achiever.get(head) is not axiom:
+                continue
+            self._support(head, None)
+            removed.append(head)
+            queue.extend(self._set(head, False))
+        self._derive(satisfied + [a for head in removed for a in self.axioms_from_eff[head]])
+        self._frame = None
+
+    def undo(self):
+        flips, changes, supports = self.history.pop()
+        for head, axiom in reversed(supports):
+            if axiom is None:
+                self.achiever.pop(head, None)
+            else:
+                self.achiever[head] = axiom
+        for head, present, value in reversed(changes):
+            was_true = self._true(head)
+            if present:
+                self.state[head] = value
+            else:
+                self.state.pop(head, None)
+            self._flip(head, was_true, self._true(head))
+        for head, was_true, is_true in flips:
+            self._flip(head, is_true, was_true)
+
+    def is_derived(self, head):
+        return head in self.axioms_from_eff
+
+    def derived(self):
+        return {Atom(head) for head in self.achiever}
+
+    def _supporting_axioms(self, head, supporters):
+        axiom = self.achiever.get(head)
+        if (axiom is None) or (axiom in supporters):
+            return
+        for pre in axiom.preconditions:
+            self._supporting_axioms(pre.head, supporters)
+        supporters.append(axiom)
+
+    def supporting_axioms(self, goals):
+        supporters = []
+        for goal in goals:
+            if isinstance(goal, Atom) and (goal.head in self.achiever):
+                self._supporting_axioms(goal.head, supporters)
+            elif self.is_derived(goal.head):
+                if isinstance(goal, Atom):
+                    raise KeyError(goal)
+            elif not goal.holds(self.state):
+                raise KeyError(goal)
+        return supporters
+
+    def __repr__(self):
+        return '{}(axioms={},derived={})'.format(self.__class__.__name__, len(self.axioms), len(self.achiever))
+
+
+class StateSimulator(object):
+    # Applies operators in place, keeping an undo log per step
+
+    def __init__(self, evaluations, axiom_instances=tuple(), default=bool):
+        self.state = apply(evaluations, defaultdict(default))
+        self.axioms = AxiomEvaluator(self.state, axiom_instances)
+        self.history = []
+
+    def holds(self, literals):
+        return applicable(literals, self.state)
+
+    def applicable(self, operator):
+        return self.holds(operator.preconditions)
+
+    def apply(self, operator):
+        changes = []
+        was_true = {}
+        for effect in ordered_effects(operator.effects):
+            if effect.head not in was_true:
+                was_true[effect.head] = self.state.get(effect.head) == True
+            changes.append((effect.head, effect.head in self.state, self.state.get(effect.head)))
+            effect.assign(self.state)
+        self.history.append(changes)
+        self.axioms.update(was_true)
+
+    def undo(self):
+        for head, present, value in reversed(self.history.pop()):
+            if present:
+                self.state[head] = value
+            else:
+                self.state.pop(head, None)
+        self.axioms.undo()
+
+    def derived(self):
+        return self.axioms.derived()
+
+    def supporting_axioms(self, goals):
+        return self.axioms.supporting_axioms(goals)
+
+    def __repr__(self):
+        return '{}(steps={},derived={})'.format(self.__class__.__name__, len(self.history), len(self.axioms.achiever))
@@ -0,0 +1,145 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from threading import Lock
+from time import time
+
+
+class RelationStatistics(object):
+
+    def __init__(self, calls=0, successes=0, outputs=0, cache_hits=0, total_time=0., timeouts=0):
+        self.calls = calls
+        self.successes = successes
+        self.outputs = outputs
+        self.cache_hits = cache_hits
+        self.total_time = total_time
+        self.timeouts = timeouts
+        self._lock = Lock()
+
+    def record(self, elapsed, num_outputs):
+        with self._lock:
+            self.calls += 1
+            self.successes += (0 < num_outputs)
+            self.outputs += num_outputs
+            self.total_time += elapsed
+
+    def record_timeout(self, elapsed):
+        with self._lock:
+            self.calls += 1
+            self.timeouts += 1
+            self.total_time += elapsed
+
+    def record_hit(self):
+        with self._lock:
+            self.cache_hits += 1
+
+    def success_rate(self):
+        return float(self.successes) / self.calls if self.calls else 0.
+
+    def outputs_per_call(self):
+        return float(self.outputs) / self.calls if self.calls else 0.
+
+    def time_per_call(self):
+        return self.total_time / self.calls if self.calls else 0.
+
+    def copy(self):
+        return self.__class__(self.calls, self.successes, self.outputs, self.cache_hits, self.total_time,
+                              self.timeouts)
+
+    def __sub__(self, other):
+        return self.__class__(self.calls - other.calls, self.successes - other.successes,
+                              self.outputs - other.outputs, self.cache_hits - other.cache_hits,
+                              self.total_time - other.total_time, self.timeouts - other.timeouts)
+
+    def report(self):
+        return {
+            'calls': self.calls,
+            'successes': self.successes,
+            'outputs': self.outputs,
+            'cache_hits': self.cache_hits,
+            'total_time': self.total_time,
+            'timeouts': self.timeouts,
+            'success_rate': self.success_rate(),
+            'outputs_per_call': self.outputs_per_call(),
+            'time_per_call': self.time_per_call(),
+        }
+
+    def __repr__(self):
+        return '{}(calls={},successes={},outputs={},cache_hits={},timeouts={},time={:.3f})'.format(
+            self.__class__.__name__, self.calls, self.successes, self.outputs, self.cache_hits, self.timeouts,
+            self.total_time)
+
+
+def relation_name(relation):
+    return relation.name if relation.name else repr(relation)
+
+
+@contextmanager
+def phase(statistics, name):
+    if statistics is None:
+        yield
+        return
+    with statistics.phase(name):
+        yield
+
+
+class Statistics(object):
+
+    def __init__(self, problem):
+        self.start_time = time()
+        self.phase_times = defaultdict(float)
+        self.counters = {}
+        self.streams = list(problem.streams)
+        self.functions = sorted((f for f in problem.functions() if f.is_defined()), key=lambda f: f.name)
+        self._initial = {r: r.statistics.copy() for r in (self.streams + self.functions)}
+
+    def elapsed_time(self):
+        return time() - self.start_time
+
+    @contextmanager
+    def phase(self, name):
+        start_time = time()
+        try:
+            yield
+        finally:
+            self.phase_times[name] += time() - start_time
+
+    def update(self, **counters):
+        self.counters.update(counters)
+
+    def get_counters(self):
+        counters = dict(self.counters)
+        counters['stream_calls'] = sum(s.calls for s in self.stream_statistics().values())
+        counters['function_calls'] = sum(s.calls for s in self.function_statistics().values())
+        return counters
+
+    def relation_statistics(self, relation):
+        return relation.statistics - self._initial[relation]
+
+    def stream_statistics(self):
+        return {relation_name(s): self.relation_statistics(s) for s in self.streams}
+
+    def function_statistics(self):
+        return {relation_name(f): self.relation_statistics(f) for f in self.functions}
+
+    def report(self):
+        return {
+            'total_time': self.elapsed_time(),
+            'phases': dict(self.phase_times),
+            'counters': self.get_counters(),
+            'streams': {name: s.report() for name, s in self.stream_statistics().items()},
+            'functions': {name: s.report() for name, s in self.function_statistics().items()},
+        }
+
+    def dump(self):
+        print 'Total time: {:.3f}'.format(self.elapsed_time())
+        print 'Phases:', ' | '.join('{}: {:.3f}'.format(name, t) for name, t in sorted(
+            self.phase_times.items(), key=lambda (_, t): -t))
+        print 'Counters:', ' | '.join('{}: {}'.format(*pair) for pair in sorted(self.get_counters().items()))
+        relations = sorted(self.stream_statistics().items() + self.function_statistics().items(),
+                           key=lambda (name, s): -s.total_time)
+        for name, s in relations:
+            print '{} | Calls: {} | Success: {:.3f} | Outputs: {:.3f} | Hits: {} | Time: {:.3f}'.format(
+                name, s.calls, s.success_rate(), s.outputs_per_call(), s.cache_hits, s.total_time)
+
+    def __repr__(self):
+        return '{}(time={:.3f})'.format(self.__class__.__name__, self.elapsed_time())
@@ -1,8 +1,17 @@
+import sys
+import time
+from threading import Thread
+
 from bounds import SharedOutputSet, INF
 from functions import process_parameters, process_domain, Object
 from ss.model.bounds import unique_bound_fn, shared_bound_fn, no_bound_fn, cyclic_bound_fn, depth_bound_fn, PartialBoundFn
+from ss.model.effort_model import get_effort_model
+from ss.model.result_cache import get_result_cache
+from ss.model.statistics import RelationStatistics
 from ss.utils import Hashable
 
+BATCH_SIZE = 100
+
 
 class Context(object):
 
@@ -26,6 +35,34 @@ class CondGen(object):
         raise NotImplementedError()
 
 
+class SupervisedCall(object):
+    # Runs a stream body in a daemon thread so that callers can stop waiting on it
+
+    def __init__(self, key, fn, *args, **kwargs):
+        self.key = key
+        self.start_time = time.time()
+        self.result = None
+        self.error = None
+        self.thread = Thread(target=self._run, args=(fn, args, kwargs))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _run(self, fn, args, kwargs):
+        try:
+            self.result = fn(*args, **kwargs)
+        except BaseException:
+            self.error = sys.exc_info()
+
+    def wait(self, timeout=INF):
+        self.thread.join(None if timeout == INF else max(timeout, 0))
+        return not self.thread.is_alive()
+
+    def get(self):
+        if self.error is not None:
+            raise self.error[0], self.error[1], self.error[2]
+        return self.result
+
+
 class StreamInstance(Hashable):
 
     def __init__(self, stream, inputs):
@@ -37,6 +74,9 @@ class StreamInstance(Hashable):
         self.generator = None
         self.disabled = False
         self.calls = 0
+        self.advances = 0
+        self.timeouts = 0
+        self.pending = None
         self.use_unique = (stream.bound_type == 'unique')
 
     def domain_mapping(self):
@@ -54,33 +94,97 @@ class StreamInstance(Hashable):
         mapping = self.graph_mapping(outputs)
         return [atom.substitute(mapping) for atom in self.stream.graph]
 
-    def next_outputs(self, context=None):
+    def _replay(self, cache):
+        result = cache.get(self.stream.name, self.inputs + (self.calls,))
+        if result is None:
+            return None
+        outputs, enumerated = result
+        self._finish_call(enumerated)
+        self.stream.statistics.record_hit()
+        return outputs
+
+    def get_timeout(self):
+        if self.stream.backoff is None:
+            return self.stream.timeout
+        return self.stream.timeout * self.stream.backoff ** self.timeouts
+
+    def next_outputs(self, context=None, max_time=INF):
+        cache = get_result_cache() if self.stream.is_cacheable() else None
+        key = self.inputs + (self.calls,)
+        if (cache is not None) and (self.pending is None):
+            outputs = self._replay(cache)
+            if outputs is not None:
+                return outputs
+        start_time = time.time()
+        timeout = self.get_timeout()
+        if (self.pending is None) and (timeout == INF):
+            outputs = self._next_outputs(context=context)
+        else:
+            # A call that was interrupted earlier is resumed rather than restarted
+            if self.pending is None:
+                self.pending = SupervisedCall(key, self._generate, context=context)
+            remaining = timeout - (start_time - self.pending.start_time)
+            if not self.pending.wait(min(remaining, max_time)):
+                if max_time < remaining:
+                    # The caller's budget ran out first, so the call stays pending
+                    return []
+                self.timeouts += 1
+                self.stream.statistics.record_timeout(time.time() - start_time)
+                if self.stream.backoff is None:
+                    self.enumerated = True
+                    self.pending = None
+                return []
+            call, self.pending = self.pending, None
+            key = call.key
+            outputs, enumerated = call.get()
+            self._finish_call(enumerated)
+        self.stream.statistics.record(time.time() - start_time, len(outputs))
+        if (cache is not None) and not isinstance(self.generator, CondGen):
+            cache.put(self.stream.name, key, (outputs, self.enumerated))
+        return outputs
+
+    def _next_outputs(self, context=None):
+        outputs, enumerated = self._generate(context=context)
+        self._finish_call(enumerated)
+        return outputs
+
+    def _generate(self, context=None):
+        # Only advances the generator, so a supervised call abandoned after a timeout cannot change calls or enumerated
         assert not self.enumerated
         if self.generator is None:
             self.generator = self.stream.fn(*self.inputs)
-        self.calls += 1
-        if self.stream.max_calls <= self.calls:
-            self.enumerated = True
         if isinstance(self.generator, CondGen):
             outputs = self.generator.generate(context=context)
-            self.enumerated = self.generator.enumerated
-            return outputs
-        else:
-            try:
-                return next(self.generator)
-            except StopIteration:
-                self.enumerated = True
-                return []
+            return outputs, self.generator.enumerated
+        # Skip the calls that were replayed from the result cache since the generator last ran
+        while self.advances < self.calls:
+            self.advances += 1
+            next(self.generator, None)
+        self.advances += 1
+        try:
+            return next(self.generator), False
+        except StopIteration:
+            return [], True
+
+    def _finish_call(self, enumerated):
+        self.calls += 1
+        self.enumerated = enumerated or (self.stream.max_calls <= self.calls)
 
-    def next_atoms(self, context=None):
+    def output_atoms(self, outputs):
         if isinstance(self.stream, WildStream):
-            return self.next_outputs(context=context)
-        return [a for atoms in map(self.substitute_graph, self.next_outputs(context=context)) for a in atoms]
+            return outputs
+        return [a for atoms in map(self.substitute_graph, outputs) for a in atoms]
+
+    def next_atoms(self, context=None, max_time=INF):
+        return self.output_atoms(self.next_outputs(context=context, max_time=max_time))
 
     def get_effort(self):
         if self.enumerated or self.disabled:
             return INF
-        return self.stream.effort_fn(*self.inputs)
+        effort = self.stream.effort_fn(*self.inputs)
+        if self.timeouts and (self.stream.backoff is not None):
+            effort *= self.stream.backoff ** self.timeouts
+        return effort
 
     def bound_outputs(self):
         if self.enumerated or self.disabled:
@@ -100,7 +204,8 @@ class StreamInstance(Hashable):
 class Stream(object):
     """ Function to generator """
 
-    def __init__(self, inp, domain, fn, out, graph, bound='cyclic', effort=1, max_calls=INF, eager=False, name=""):
+    def __init__(self, inp, domain, fn, out, graph, bound='cyclic', effort=1, max_calls=INF, eager=False, name="",
+                 timeout=INF, backoff=None):
         self.inputs = process_parameters(inp)
         self.domain = process_domain(
             list(domain) + [Object(p) for p in self.inputs])
@@ -110,6 +215,8 @@ class Stream(object):
         self.max_calls = max_calls
         self.eager = eager
         self.name = name
+        self.timeout = timeout
+        self.backoff = backoff
         if any(atom.head.has_constants() for atom in self.domain):
             raise NotImplementedError(
                 'Unable to have constants in domain currently')
@@ -133,6 +240,7 @@ class Stream(object):
         self.effort = effort
 
         self.instances = {}
+        self.statistics = RelationStatistics()
 
     def bound_fn(self, *args):
         assert callable(self.bound)
@@ -142,8 +250,15 @@ class Stream(object):
 
         if callable(self.effort):
             return self.effort(*args)
+        model = get_effort_model()
+        if (model is not None) and (self.effort != INF):
+            return model.get_effort(self)
         return self.effort
 
+    def is_cacheable(self):
+        return bool(self.name) and not isinstance(self, WildStream) and \
+            not (isinstance(self.fn, type) and issubclass(self.fn, CondGen))
+
     def get_instance(self, inputs):
         inputs = tuple(inputs)
         if inputs not in self.instances:
@@ -203,3 +318,60 @@ class TestStream(FnStream):
         super(TestStream, self).__init__(inp, domain,
                                          lambda *args: tuple() if test(*args) else None,
                                          [], graph, **kwargs)
+
+
+class BatchStream(Stream):
+    """ Function from a list of inputs to a list of outputs """
+
+    def __init__(self, inp, domain, fn, out, graph, batch_size=BATCH_SIZE, **kwargs):
+        def list_fn(*args):
+            outputs, = fn([args])
+            if outputs is None:
+                return iter([[]])
+            return iter([[outputs]])
+        # Each instance is evaluated exactly once, so max_calls is always 1
+        kwargs.pop('max_calls', None)
+        if kwargs.get('timeout', INF) != INF:
+            raise ValueError('Batch streams are evaluated inline and do not support a timeout')
+        super(BatchStream, self).__init__(inp, domain, list_fn, out, graph, max_calls=1, **kwargs)
+        self.batch_fn = fn
+        self.batch_size = batch_size
+
+    def next_outputs_batch(self, instances):
+        cache = get_result_cache() if self.is_cacheable() else None
+        outputs = [None] * len(instances)
+        pending = []
+        for i, instance in enumerate(instances):
+            assert (instance.stream is self) and not instance.enumerated
+            if cache is not None:
+                outputs[i] = instance._replay(cache)
+            if outputs[i] is None:
+                pending.append(i)
+        if not pending:
+            return outputs
+        start_time = time.time()
+        results = list(self.batch_fn([instances[i].inputs for i in pending]))
+        assert len(results) == len(pending)
+        elapsed = (time.time() - start_time) / len(pending)
+        for i, result in zip(pending, results):
+            instance = instances[i]
+            key = instance.inputs + (instance.calls,)
+            instance._finish_call(True)
+            outputs[i] = [] if result is None else [result]
+            self.statistics.record(elapsed, len(outputs[i]))
+            if cache is not None:
+                cache.put(self.name, key, (outputs[i], True))
+        return outputs
+
+    def next_atoms_batch(self, instances):
+        return [instance.output_atoms(outputs) for instance, outputs
+                in zip(instances, self.next_outputs_batch(instances))]
+
+
+class BatchTestStream(BatchStream):
+    """ Test over a list of inputs """
+
+    def __init__(self, inp, domain, test, graph, **kwargs):
+        super(BatchTestStream, self).__init__(inp, domain,
+                                              lambda inputs: [tuple() if r else None for r in test(inputs)],
+                                              [], graph, **kwargs)
@@ -74,25 +74,29 @@ def pddl_axioms(axioms):
 
 
 def pddl_domain(domain, constants, predicates, functions, actions, axioms):
-
-    return '(define (domain {})\n'           '\t(:requirements :typing)\n'           '\t(:types {})\n'           '\t(:constants {})\n'           '\t(:predicates {})\n'           '\t(:functions {})\n'           '{})\n'.format(domain, DEFAULT_TYPE,
-                                                                                                                                                                                                                                 pddl_parameter(
-                                                                                                                                                                                                                                     ' '.join(sorted(constants))),
-                                                                                                                                                                                                                                 pddl_functions(
-                                                                                                                                                                                                                                     predicates),
-                                                                                                                                                                                                                                 pddl_functions(
-                                                                                                                                                                                                                                     functions),
-                                                                                                                                                                                                                                 '\n'.join(list(pddl_actions(actions)) +
-                                                                                                                                                                                                                                           list(pddl_axioms(axioms))))
+    s = '(define (domain {})\n' \
+        '\t(:requirements :typing)\n' \
+        '\t(:types {})\n'.format(domain, DEFAULT_TYPE)
+    if constants:
+        s += '\t(:constants {})\n'.format(pddl_parameter(' '.join(sorted(constants))))
+    s += '\t(:predicates {})\n' \
+         '\t(:functions {})\n' \
+         '{})\n'.format(pddl_functions(predicates), pddl_functions(functions),
+                        '\n'.join(list(pddl_actions(actions)) + list(pddl_axioms(axioms))))
+    return s
 
 
 def pddl_problem(problem, domain, objects, initial_atoms, goal_literals, objective=None):
+    return format_problem(problem, domain, objects, pddl_functions(initial_atoms), goal_literals, objective)
 
-    s = '(define (problem {})\n'           '\t(:domain {})\n'           '\t(:init {})\n'           '\t(:goal {})'.format(problem, domain,
 
-                                                                                                                         pddl_functions(
-                                                                                                                             initial_atoms),
-                                                                                                                         pddl_conjunction(goal_literals))
+def format_problem(problem, domain, objects, init, goal_literals, objective=None):
+    s = '(define (problem {})\n' \
+        '\t(:domain {})\n'.format(problem, domain)
+    if objects:
+        s += '\t(:objects {})\n'.format(pddl_parameter(' '.join(objects)))
+    s += '\t(:init {})\n' \
+         '\t(:goal {})'.format(init, pddl_conjunction(goal_literals))
     if objective is not None:
         s += '\n\t(:metric minimize {})'.format(objective.pddl())
     return s + ')\n'
@@ -1,4 +1,9 @@
+from threading import Lock
+from weakref import WeakValueDictionary
+
+
 class Hashable(object):
+    __slots__ = ('_tuple', '_hash')
 
     def __init__(self, *args):
         self._tuple = tuple(args)
@@ -13,6 +18,95 @@ class Hashable(object):
     def __hash__(self):
         return self._hash
 
+# Setting this to False before ss.model is imported disables interning (benchmarks use it as a baseline)
+INTERNING = True
+
+
+class Interned(type):
+    _lock = Lock()
+
+    def __init__(cls, name, bases, attrs):
+        super(Interned, cls).__init__(name, bases, attrs)
+        cls._instances = WeakValueDictionary() if INTERNING else None
+
+    def __call__(cls, *args):
+        key = cls._key(*args)
+        if cls._instances is None:
+            return super(Interned, cls).__call__(*key)
+        instance = cls._instances.get(key)
+        if instance is None:
+            with cls._lock:
+                instance = cls._instances.get(key)
+                if instance is None:
+                    instance = super(Interned, cls).__call__(*key)
+                    cls._instances[key] = instance
+        return instance
+
+
+class InternedHashable(Hashable):
+    __metaclass__ = Interned
+    __slots__ = ('__weakref__',)
+
+    @classmethod
+    def _key(cls, *args):
+        return args
+
+    def __init__(self, *args):
+        self._tuple = args
+        self._hash = hash((self.__class__,) + args)
+
+    def __eq__(self, other):
+        if self._instances is None:
+            return Hashable.__eq__(self, other)
+        return self is other
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def __hash__(self):
+        return self._hash
+
+
+class LRUCache(object):
+    _missing = object()
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._recent = {}
+        self._old = {}
+
+    def get(self, key, default=None):
+        value = self._recent.get(key, self._missing)
+        if value is self._missing:
+            value = self._old.pop(key, self._missing)
+            if value is self._missing:
+                self.misses += 1
+                return default
+            self[key] = value
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        self._recent[key] = value
+        if (self.max_size is not None) and (self.max_size <= 2 * len(self._recent)):
+            self._old = self._recent
+            self._recent = {}
+
+    def __contains__(self, key):
+        return (key in self._recent) or (key in self._old)
+
+    def __len__(self):
+        return len(self._recent) + len(self._old)
+
+    def clear(self):
+        self._recent = {}
+        self._old = {}
+
+    def __repr__(self):
+        return '{}(size={},hits={},misses={})'.format(self.__class__.__name__, len(self), self.hits, self.misses)
+
 
 INF = float('inf')
 INT_INF = 1e6
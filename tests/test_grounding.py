@@ -0,0 +1,42 @@
+import unittest
+
+from ss.algorithms.incremental import solve_universe
+from ss.algorithms.universe import Universe
+from ss.model.functions import Predicate
+from ss.model.operators import Action, apply
+from ss.model.problem import Problem
+
+
+def create_problem():
+    # Move(0, 0) both adds and deletes AtConf(0), so the goal is only reachable if the add wins
+    Conf = Predicate('?q')
+    AtConf = Predicate('?q')
+    Visited = Predicate('?q')
+    actions = [
+        Action(name='Move', param='?q1 ?q2',
+               pre=[Conf('?q1'), Conf('?q2'), AtConf('?q1')],
+               eff=[AtConf('?q2'), ~AtConf('?q1'), Visited('?q2')]),
+    ]
+    initial = [Conf(0), AtConf(0)]
+    goal = [AtConf(0), Visited(0)]
+    return Problem(initial, goal, actions, [], []), AtConf
+
+
+class TestConflictingEffects(unittest.TestCase):
+
+    def test_apply(self):
+        problem, AtConf = create_problem()
+        move = problem.actions[0].instantiate((0, 0))
+        state = apply(move.effects, {AtConf(0).head: True})
+        self.assertIs(state[AtConf(0).head], True)
+
+    def test_sas(self):
+        problem, _ = create_problem()
+        universe = Universe(problem, problem.initial, use_bounds=False, only_eager=False)
+        plan = solve_universe(universe, grounding='sas', planner='max-astar')
+        self.assertEqual([(action.name, args) for action, args in plan], [('move', (0, 0))])
+        self.assertTrue(universe.is_solution(plan))
+
+
+if __name__ == '__main__':
+    unittest.main()
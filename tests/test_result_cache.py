@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from ss.model.functions import Predicate
+from ss.model.result_cache import result_cache
+from ss.model.streams import GenStream
+
+
+def create_stream():
+    Item = Predicate('?x')
+    Value = Predicate('?x ?y')
+    return GenStream(inp='?x', domain=[Item('?x')], fn=lambda x: ((100 + i,) for i in xrange(10)),
+                     out='?y', graph=[Value('?x', '?y')], name='count')
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'results.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_gap(self):
+        # Only call 1 is cached, so calls 0, 2 and 3 run the generator around a replayed call
+        with result_cache(self.path) as cache:
+            cache.put('count', (0, 1), ([(101,)], False))
+            instance = create_stream().get_instance((0,))
+            outputs = [instance.next_outputs() for _ in xrange(4)]
+            self.assertEqual(outputs, [[(100,)], [(101,)], [(102,)], [(103,)]])
+            for call in xrange(4):
+                self.assertEqual(cache.get('count', (0, call)), ([(100 + call,)], False))
+
+    def test_replay(self):
+        with result_cache(self.path):
+            instance = create_stream().get_instance((0,))
+            expected = [instance.next_outputs() for _ in xrange(3)]
+        with result_cache(self.path):
+            stream = create_stream()
+            instance = stream.get_instance((0,))
+            self.assertEqual([instance.next_outputs() for _ in xrange(3)], expected)
+            self.assertEqual(stream.statistics.calls, 0)
+            self.assertEqual(instance.next_outputs(), [(103,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
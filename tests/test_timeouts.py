@@ -0,0 +1,43 @@
+import time
+import unittest
+
+from ss.model.functions import Predicate
+from ss.model.streams import FnStream, BatchStream
+
+
+def create_stream(delay, **kwargs):
+    Item = Predicate('?x')
+    Value = Predicate('?x ?y')
+
+    def fn(x):
+        time.sleep(delay)
+        return (x + 1,)
+    return FnStream(inp='?x', domain=[Item('?x')], fn=fn, out='?y', graph=[Value('?x', '?y')], **kwargs)
+
+
+class TestTimeouts(unittest.TestCase):
+
+    def test_abandoned(self):
+        # The body finishes after the instance gave up on it and must not update the instance
+        instance = create_stream(0.2, timeout=0.05).get_instance((0,))
+        self.assertEqual(instance.next_outputs(), [])
+        self.assertTrue(instance.enumerated)
+        time.sleep(0.3)
+        self.assertEqual(instance.calls, 0)
+        self.assertTrue(instance.enumerated)
+
+    def test_backoff(self):
+        instance = create_stream(0.2, timeout=0.05, backoff=10).get_instance((0,))
+        self.assertEqual(instance.next_outputs(), [])
+        self.assertEqual((instance.calls, instance.enumerated, instance.timeouts), (0, False, 1))
+        self.assertEqual(instance.next_outputs(), [(1,)])
+        self.assertEqual((instance.calls, instance.enumerated), (1, True))
+
+    def test_batch_timeout(self):
+        Item = Predicate('?x')
+        with self.assertRaises(ValueError):
+            BatchStream(inp='?x', domain=[Item('?x')], fn=lambda inputs: inputs, out='?y', graph=[], timeout=1)
+
+
+if __name__ == '__main__':
+    unittest.main()